@@ -5,9 +5,15 @@ __version__ = "2.0.9"
 from .core import (
     obfuscate,
     obfuscate_multiple,
-    get_available_scripts, CHARACTER_SETS
+    obfuscate_fanout,
+    obfuscate_source,
+    obfuscate_sources,
+    get_available_scripts, get_alphabet, CHARACTER_SETS
 )
 from .kannadafy import (
     obfuscate_api,
     obfuscate_multiple_api
 )
+from .alphabet import Alphabet
+from .pipeline import Pipeline
+from .obfuscator import Obfuscator
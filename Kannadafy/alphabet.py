@@ -0,0 +1,144 @@
+"""
+Compiled Alphabets for Kannadafy
+
+Alphabets are plain lists of glyphs wherever they come from (CHARACTER_SETS,
+mapping files, word lists, custom_alphabet), and every encoding call used to
+validate them and work out again which glyphs it can use. An Alphabet does
+that once, when it is built, and keeps the results:
+
+    alphabet = Alphabet(["ಅ", "ಆ", "ಇ", ...])
+    alphabet.prefix_free      # no glyph starts another one
+    alphabet.separable        # the glyphs usable without separators
+    alphabet.digest           # stable content hash, usable as a cache key
+
+An Alphabet is immutable and behaves as a sequence of its glyphs, so it can
+be passed wherever a list of glyphs is accepted.
+"""
+
+import hashlib
+import json
+from types import MappingProxyType
+from typing import Iterable, List, Optional
+
+from Kannadafy.utils.validation import validate_mapping
+
+def literal_glyphs(glyphs: Iterable[str]) -> List[str]:
+    """Glyphs that can sit inside the payload literal.
+
+    Quotes and backslashes would end or escape the literal, and whitespace
+    would be taken for a separator.
+    """
+    return [glyph for glyph in glyphs if glyph and not any(c in '"\\' or c.isspace() for c in glyph)]
+
+def separable_glyphs(glyphs: Iterable[str]) -> List[str]:
+    """Select the glyphs that can be concatenated without separators.
+
+    A glyph is skipped if it cannot sit inside the payload literal or if it
+    is a prefix of, or has as a prefix, a glyph that was already selected
+    (e.g. "ಅ" and "ಅಂ").
+    """
+    # Trie of the selected glyphs: walking a glyph down it meets the end of
+    # a selected glyph that is its prefix, or ends on a node that selected
+    # glyphs continue, so each glyph costs its length, not a scan
+    selected, root, end = [], {}, object()
+    for glyph in literal_glyphs(glyphs):
+        node = root
+        for c in glyph:
+            if end in node:
+                break
+            node = node.get(c)
+            if node is None:
+                break
+        else:
+            # A selected glyph starts with this one (or is this one)
+            continue
+        if node is not None:
+            # A selected glyph is a prefix of this one
+            continue
+        node = root
+        for c in glyph:
+            node = node.setdefault(c, {})
+        node[end] = True
+        selected.append(glyph)
+    return selected
+
+class Alphabet:
+    """An immutable, validated alphabet with what the encodings need precomputed."""
+
+    __slots__ = ("glyphs", "name", "index", "byte_lengths", "min_bytes", "max_bytes", "literal", "separable",
+                 "prefix_free", "digest")
+
+    def __init__(self, glyphs: Iterable[str], name: Optional[str] = None):
+        """Validate the glyphs and precompute what the encodings use.
+
+        Args:
+            glyphs: At least 10 distinct glyphs
+            name: Script type or mapping the glyphs come from, for reports
+
+        Raises:
+            ValueError: If there are fewer than 10 glyphs, duplicates or
+                glyphs that are not strings
+        """
+        glyphs = tuple(glyphs)
+        for glyph in glyphs:
+            if not isinstance(glyph, str):
+                raise ValueError(f"Mapping contains a glyph that is not a string: {glyph!r}")
+        validate_mapping(glyphs)
+        byte_lengths = tuple(len(glyph.encode("utf-8")) for glyph in glyphs)
+        literal = tuple(literal_glyphs(glyphs))
+        separable = tuple(separable_glyphs(glyphs))
+        ordered = sorted(glyphs)
+        set_ = object.__setattr__
+        set_(self, "glyphs", glyphs)
+        set_(self, "name", name)
+        # Glyph -> position, for decoding
+        set_(self, "index", MappingProxyType({glyph: i for i, glyph in enumerate(glyphs)}))
+        # UTF-8 size of each glyph, and the smallest and largest
+        set_(self, "byte_lengths", byte_lengths)
+        set_(self, "min_bytes", min(byte_lengths))
+        set_(self, "max_bytes", max(byte_lengths))
+        # Glyphs usable inside the payload literal (see literal_glyphs),
+        # and those of them usable without separators (see separable_glyphs)
+        set_(self, "literal", literal)
+        set_(self, "separable", separable)
+        # In sorted order a prefix comes right before the glyphs it starts
+        set_(self, "prefix_free", not any(b.startswith(a) for a, b in zip(ordered, ordered[1:])))
+        set_(self, "digest", hashlib.sha256(json.dumps(glyphs, ensure_ascii=False).encode("utf-8")).hexdigest())
+
+    @classmethod
+    def of(cls, glyphs: Iterable[str], name: Optional[str] = None) -> "Alphabet":
+        """Return glyphs if it is an Alphabet already, else compile it."""
+        return glyphs if isinstance(glyphs, cls) else cls(glyphs, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Alphabet is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Alphabet is immutable")
+
+    def __reduce__(self):
+        return type(self), (self.glyphs, self.name)
+
+    def __len__(self):
+        return len(self.glyphs)
+
+    def __iter__(self):
+        return iter(self.glyphs)
+
+    def __getitem__(self, i):
+        return self.glyphs[i]
+
+    def __contains__(self, glyph):
+        return glyph in self.index
+
+    def __eq__(self, other):
+        if isinstance(other, Alphabet):
+            return self.glyphs == other.glyphs
+        return NotImplemented
+
+    def __hash__(self):
+        return int(self.digest[:16], 16)
+
+    def __repr__(self):
+        label = f"{self.name!r}, " if self.name else ""
+        return f"Alphabet({label}{len(self.glyphs)} glyphs, digest={self.digest[:12]})"
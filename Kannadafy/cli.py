@@ -6,8 +6,9 @@ from datetime import datetime
 from typing import List, Optional
 from importlib.metadata import version, PackageNotFoundError
 from Kannadafy.core import (
-    obfuscate, get_available_scripts,
-    generate_mapping_template, obfuscate_multiple
+    obfuscate, get_available_scripts, fanout_output_path,
+    generate_mapping_template, obfuscate_multiple, output_diff, ENCODINGS,
+    LAYOUTS, DEFAULT_LAYOUT, AUTO_CRITERIA, COMPRESSIONS, get_alphabet
 )
 
 # Use a direct version string instead of importing
@@ -45,6 +46,56 @@ def print_banner():
     print("  Enhanced with text-based obfuscation")
     print("-" * 50)
 
+def encoding_name(value):
+    """Argument type for a built-in encoding or an installed encoder plugin."""
+    if value in ENCODINGS:
+        return value
+    from Kannadafy.encoders import available_encoders
+    if value not in available_encoders():
+        raise argparse.ArgumentTypeError(
+            f"invalid encoding: {value!r} (choose from {', '.join(available_encoders())})"
+        )
+    return value
+
+def script_type_list(value):
+    """Argument type for one script type, "auto" or a comma-separated list of script types."""
+    if value == "auto":
+        return value
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in get_available_scripts()]
+    if not names or unknown:
+        raise argparse.ArgumentTypeError(
+            f"invalid script type: {', '.join(unknown) or value!r} (choose from {', '.join(get_available_scripts())})"
+        )
+    return ",".join(names)
+
+def print_report(report, name=None):
+    """Print the glyph assignment chosen for an obfuscated file."""
+    from Kannadafy.utils.glyph_cost import describe_assignment
+    prefix = f"{name}: " if name else ""
+    print(f"  {prefix}{report['encoding']} encoding, glyphs: {describe_assignment(report['assignment'])}")
+    if "minify" in report:
+        stage = report["minify"]
+        print(f"  {prefix}minified, {stage['size']} -> {stage['minified']} characters")
+    if "tokens" in report:
+        stage = report["tokens"]
+        print(f"  {prefix}token dictionary, {stage['size']} -> {stage['encoded']} characters "
+              f"({stage['names']} names)")
+    if "whitespace" in report:
+        stage = report["whitespace"]
+        print(f"  {prefix}whitespace stage, {stage['size']} -> {stage['encoded']} characters "
+              f"({stage['escapes']} escapes)")
+    if "compression" in report:
+        stage = report["compression"]
+        shared = " (shared dictionary)" if stage.get("shared_dictionary") else ""
+        print(f"  {prefix}{stage['method']} compression{shared}, {stage['size']} -> {stage['compressed']} bytes")
+    if "xor" in report:
+        stage = report["xor"]
+        print(f"  {prefix}keystream XOR over {stage['size']} bytes ({stage['key_size']}-byte key)")
+    for stage in report.get("stages", []):
+        print(f"  {prefix}{stage['name']} step: {stage['seconds'] * 1000:.1f} ms, "
+              f"{stage['bytes_in']} -> {stage['bytes_out']} bytes")
+
 def obfuscate_cmd(args):
     """Handle the obfuscation command."""
     try:
@@ -63,6 +114,22 @@ def obfuscate_cmd(args):
         mapping_file = None
         text_files = None
         script_type = "kannada"  # Default to kannada
+        encoding = getattr(args, 'encoding', "digits")
+        stream = getattr(args, 'stream', False)
+        workers = getattr(args, 'jobs', None)
+        report = {} if getattr(args, 'report', False) else None
+        layout = getattr(args, 'layout', DEFAULT_LAYOUT)
+        auto_criterion = getattr(args, 'auto_criterion', "size")
+        candidate_files = getattr(args, 'candidates', None)
+        compress = getattr(args, 'compress', None)
+        shared_dictionary = getattr(args, 'shared_dict', False)
+        whitespace = getattr(args, 'whitespace', False)
+        tokens = getattr(args, 'tokens', False)
+        minify = False
+        if getattr(args, 'minify', False):
+            minify = {"keep_docstrings": args.keep_docstrings, "indent": args.minify_indent}
+        xor_key = getattr(args, 'xor', None)
+        pipeline = getattr(args, 'pipeline', None)
 
         # Check for mapping file
         if hasattr(args, 'mapping_file'):
@@ -106,11 +173,26 @@ def obfuscate_cmd(args):
                 script_type,
                 mapping_file,
                 None,
-                text_files
+                text_files,
+                encoding,
+                stream,
+                report,
+                layout,
+                auto_criterion,
+                candidate_files,
+                compress,
+                shared_dictionary,
+                whitespace,
+                tokens,
+                minify,
+                xor_key,
+                pipeline
             )
 
             if results:
                 print(f"\n[✅] Successfully obfuscated {len(results)} files to {args.output_dir}")
+                for input_file, file_report in (report or {}).items():
+                    print_report(file_report, input_file)
                 return 0
             else:
                 print("\n[❌] No files were successfully obfuscated.")
@@ -123,6 +205,9 @@ def obfuscate_cmd(args):
 
             # Get the script type if available
             script_type = args.script_type if hasattr(args, "script_type") and args.script_type else "kannada"
+            if script_type == "auto" and report is None:
+                # Needed to tell which alphabet was picked
+                report = {}
 
             obfuscate(
                 args.input,
@@ -130,9 +215,33 @@ def obfuscate_cmd(args):
                 script_type=script_type,
                 mapping_file=mapping_file,
                 custom_alphabet=None,
-                text_files=text_files
+                text_files=text_files,
+                encoding=encoding,
+                stream=stream,
+                workers=workers,
+                report=report,
+                layout=layout,
+                auto_criterion=auto_criterion,
+                candidate_files=candidate_files,
+                compress=compress,
+                whitespace=whitespace,
+                tokens=tokens,
+                minify=minify,
+                xor_key=xor_key,
+                pipeline=pipeline
             )
+            script_types = script_type.split(",")
+            if len(script_types) > 1 and not (mapping_file or text_files):
+                for name in script_types:
+                    print(f"[✅] Successfully obfuscated {args.input} to {fanout_output_path(args.output, name)}")
+                    if report:
+                        print_report(report[name], name)
+                return 0
             print(f"[✅] Successfully obfuscated {args.input} to {args.output}")
+            if "script_type" in (report or {}):
+                print(f"  Chosen script: {report['script_type']}")
+            if getattr(args, 'report', False):
+                print_report(report)
             return 0
 
     except Exception as e:
@@ -151,6 +260,51 @@ def template_cmd(args):
         print(f"[❌] Error: {str(e)}")
         return 1
 
+def diff_report_cmd(args):
+    """Handle the diff-report command."""
+    from Kannadafy.utils.chunking import diff_stats
+    try:
+        sources = []
+        for path in (args.old, args.new):
+            with open(os.path.normpath(path), 'r', encoding='utf-8') as f:
+                sources.append(f.read())
+        alphabet = get_alphabet(args.script_type)
+
+        def changed(stats):
+            share = stats['changed_size'] / stats['size'] if stats['size'] else 0
+            return (f"{stats['changed_lines']} of {stats['lines']} lines changed, "
+                    f"{stats['changed_size']} of {stats['size']} bytes ({share:.1%})")
+
+        print(f"Source: {changed(diff_stats(*sources))}")
+        for layout in args.layout:
+            try:
+                diff = output_diff(*sources, alphabet, args.encoding, layout, compress=args.compress)
+            except ValueError as e:
+                print(f"  {layout:<12} skipped: {str(e)}")
+                continue
+            print(f"  {layout:<12} output: {changed(diff['output'])}")
+        return 0
+    except Exception as e:
+        print(f"[❌] Error: {str(e)}")
+        return 1
+
+def encoders_cmd(_):
+    """Handle the encoders command."""
+    from Kannadafy.encoders import available_encoders, encoder_info
+    print("\nAvailable encodings:")
+    print(f"  {'name':<10} {'speed':<8} {'size':<8} {'origin':<12} description")
+    for name in available_encoders():
+        try:
+            info = encoder_info(name)
+        except Exception as e:
+            print(f"  {name:<10} could not be loaded: {str(e)}")
+            continue
+        whole = " (whole input)" if info.whole_input else ""
+        print(f"  {info.name:<10} {info.speed:<8} {info.size:<8} {info.origin:<12} {info.description}{whole}")
+    print("\nSpeed is how fast the output decodes, size how large it is.")
+    print("Use with: kannadafy obfuscate -e <encoding> ...")
+    return 0
+
 def version_cmd(_):
     """Handle the version command."""
     print(f"Kannadafy version {__version__}")
@@ -164,6 +318,56 @@ def available_scripts_cmd(_):
     print("\nUse with: kannadafy obfuscate -s <script_name> ...")
     return 0
 
+def _add_encoding_options(parser: argparse.ArgumentParser, multiple: bool = False):
+    """Add the encoding, layout and stage options shared by the obfuscation commands.
+
+    multiple adds the options of the commands that take several inputs
+    (--shared-dict) instead of those that take one (-j).
+    """
+    parser.add_argument("-e", "--encoding", type=encoding_name, default="digits",
+                        help="Payload encoding: digits (default), radix (fixed-width, whole alphabet), "
+                             "bigint (whole source as one number), huffman (variable-length, "
+                             "frequent characters shortest) or an installed plugin (see encoders)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Encode incrementally with bounded memory (for very large inputs)")
+    parser.add_argument("--report", action="store_true",
+                        help="Show which glyph stands for each digit in the output")
+    parser.add_argument("--layout", choices=LAYOUTS, default=DEFAULT_LAYOUT,
+                        help=f"How the payload literal is written (default: {DEFAULT_LAYOUT})")
+    parser.add_argument("-c", "--compress", choices=COMPRESSIONS, default=None,
+                        help="Compress the source before encoding it; the output decompresses it at "
+                             "import (auto picks the compressor)")
+    parser.add_argument("--whitespace", action="store_true",
+                        help="Replace indentation and runs of spaces with escape characters before encoding")
+    parser.add_argument("--tokens", action="store_true",
+                        help="Replace the most frequent names with escape characters before encoding")
+    parser.add_argument("--minify", action="store_true",
+                        help="Strip comments, docstrings, trailing whitespace and blank lines before encoding")
+    parser.add_argument("--keep-docstrings", action="store_true",
+                        help="With --minify, keep docstrings so __doc__ still works")
+    parser.add_argument("--minify-indent", action="store_true",
+                        help="With --minify, indent with one space per level")
+    parser.add_argument("--xor", nargs="?", const=True, default=None, metavar="KEY",
+                        help="XOR the payload with a shake_256 keystream of KEY (random when omitted); "
+                             "the key is written in the output")
+    parser.add_argument("--pipeline", metavar="SPEC",
+                        help="Stages to run instead of the options above, in order, e.g. "
+                             "'minify,tokens,compress=auto,xor', or a YAML/JSON pipeline file")
+    if multiple:
+        parser.add_argument("--shared-dict", action="store_true",
+                            help="Compress every file with zlib against one dictionary built from the "
+                                 "inputs, written to the output directory")
+    else:
+        parser.add_argument("-j", "--jobs", type=int, default=None,
+                            help="Encode pieces of the input on this many processes")
+
+def _add_auto_options(parser: argparse.ArgumentParser):
+    """Add the options of -s auto."""
+    parser.add_argument("--auto-criterion", choices=AUTO_CRITERIA, default="size",
+                        help="With -s auto, minimise the output size (default) or the glyphs to decode (speed)")
+    parser.add_argument("--candidates", nargs="+",
+                        help="With -s auto, mapping files to consider besides the built-in scripts")
+
 def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -178,9 +382,13 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
     obf_parser = subparsers.add_parser('obfuscate', help='Obfuscate a Python script')
     obf_parser.add_argument("-i", "--input", required=True, help="Input Python script path")
     obf_parser.add_argument("-o", "--output", required=True, help="Output Python script path")
-    obf_parser.add_argument("-s", "--script-type", choices=get_available_scripts(), default="kannada",
-                          help="Script type to use for obfuscation (default: kannada)")
+    obf_parser.add_argument("-s", "--script-type", type=script_type_list, default="kannada",
+                          help="Script type to use for obfuscation (default: kannada); several comma-separated "
+                               "types write one output each, named <output>_<type>.py; auto picks the "
+                               "one with the best estimated output")
     obf_parser.add_argument("-m", "--mapping-file", help="Path to custom mapping file")
+    _add_encoding_options(obf_parser)
+    _add_auto_options(obf_parser)
     obf_parser.set_defaults(func=obfuscate_cmd)
 
     # Text-based obfuscation
@@ -190,6 +398,7 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
     text_obf_parser.add_argument("-o", "--output", required=True, help="Output Python script path")
     text_obf_parser.add_argument("-t", "--text-files", nargs="+", required=True,
                                help="Paths to text files containing words for obfuscation")
+    _add_encoding_options(text_obf_parser)
     text_obf_parser.set_defaults(func=obfuscate_cmd, script_type=None)
 
     # Multiple file obfuscation
@@ -199,9 +408,12 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
                                 help="Input Python script paths")
     multi_obf_parser.add_argument("-o", "--output-dir", required=True,
                                 help="Output directory for obfuscated scripts")
-    multi_obf_parser.add_argument("-s", "--script-type", choices=get_available_scripts(), default="kannada",
-                                help="Script type to use for obfuscation (default: kannada)")
+    multi_obf_parser.add_argument("-s", "--script-type", choices=get_available_scripts() + ["auto"], default="kannada",
+                                help="Script type to use for obfuscation (default: kannada); auto picks the "
+                                     "one with the best estimated output for each file")
     multi_obf_parser.add_argument("-m", "--mapping-file", help="Path to custom mapping file")
+    _add_encoding_options(multi_obf_parser, multiple=True)
+    _add_auto_options(multi_obf_parser)
     multi_obf_parser.set_defaults(func=obfuscate_cmd, multiple=True)
 
     # Multiple file text-based obfuscation
@@ -213,6 +425,7 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
                                      help="Output directory for obfuscated scripts")
     multi_text_obf_parser.add_argument("-t", "--text-files", nargs="+", required=True,
                                      help="Paths to text files containing words for obfuscation")
+    _add_encoding_options(multi_text_obf_parser, multiple=True)
     multi_text_obf_parser.set_defaults(func=obfuscate_cmd, multiple=True, script_type=None)
 
     # UTILITY COMMANDS
@@ -226,15 +439,39 @@ def parse_args(args: Optional[List[str]] = None) -> argparse.Namespace:
                                help="Script type to use for template (default: kannada)")
     template_parser.set_defaults(func=template_cmd)
 
+    # Output diff report
+    diff_parser = subparsers.add_parser('diff-report',
+                                        help='Show how much the obfuscated output changes between two versions '
+                                             'of a script')
+    diff_parser.add_argument("old", help="Previous version of the Python script")
+    diff_parser.add_argument("new", help="New version of the Python script")
+    diff_parser.add_argument("-s", "--script-type", choices=get_available_scripts(), default="kannada",
+                             help="Script type to use for obfuscation (default: kannada)")
+    diff_parser.add_argument("-e", "--encoding", type=encoding_name, default="digits",
+                             help="Payload encoding (default: digits)")
+    diff_parser.add_argument("--layout", choices=LAYOUTS, nargs="+", default=[DEFAULT_LAYOUT, "chunked"],
+                             help=f"Layouts to compare (default: {DEFAULT_LAYOUT} chunked)")
+    diff_parser.add_argument("-c", "--compress", choices=COMPRESSIONS, default=None,
+                             help="Compress the source before encoding it")
+    diff_parser.set_defaults(func=diff_report_cmd)
+
     # Version command
     version_parser = subparsers.add_parser('version', help='Show version information')
     version_parser.set_defaults(func=version_cmd)
 
+    # Available encodings command
+    encoders_parser = subparsers.add_parser('encoders', help='List available payload encodings, plugins included')
+    encoders_parser.set_defaults(func=encoders_cmd)
+
     # Available scripts command
     scripts_parser = subparsers.add_parser('scripts', help='List available script types')
     scripts_parser.set_defaults(func=available_scripts_cmd)
 
-    return parser.parse_args(args)
+    parsed_args = parser.parse_args(args)
+    if (getattr(parsed_args, 'keep_docstrings', False) or getattr(parsed_args, 'minify_indent', False)) \
+            and not parsed_args.minify:
+        parser.error("--keep-docstrings and --minify-indent only apply with --minify")
+    return parsed_args
 
 def main(args: Optional[List[str]] = None) -> int:
     """Main entry point for the CLI."""
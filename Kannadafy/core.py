@@ -1,12 +1,20 @@
 # Kannadafy/core.py
 import os
+import io
 import re
+import codecs
+import mmap
+import math
+import functools
+import collections
+from concurrent.futures import ProcessPoolExecutor
 import json
 import yaml
-from pprint import pformat
 import ast
 from typing import List, Dict, Optional, Union
 
+from Kannadafy.alphabet import Alphabet, literal_glyphs, separable_glyphs
+
 # Predefined character sets
 CHARACTER_SETS = {
     "kannada": [
@@ -39,8 +47,72 @@ CHARACTER_SETS = {
 
 MAX_STR_LEN = 70
 
+# Ways of writing the payload literal into the stub:
+#   concat        lines of CONCAT_STR_LEN characters, each its own literal,
+#                 implicitly concatenated (fastest to compile after single)
+#   continuation  one literal wrapped at MAX_STR_LEN with backslash-newlines
+#   single        one literal on a single line
+#   bytes         implicitly concatenated bytes literals, non-ASCII bytes
+#                 escaped, decoded as UTF-8 at import time
+#   chunked       like concat, but the source is cut at content-defined
+#                 boundaries (see Kannadafy.utils.chunking) and each chunk
+#                 starts a new line, so an edit only changes the lines of
+#                 the chunks it touches
+# Backslash-newlines make the tokenizer take its slow path: compiling a
+# 2 MB source obfuscated with the continuation layout takes about ten
+# times longer than with concat
+LAYOUTS = ("concat", "continuation", "single", "bytes", "chunked")
+DEFAULT_LAYOUT = "concat"
+CONCAT_STR_LEN = 4096
+
+# Built-in payload encodings; installed plugins add more (see
+# Kannadafy.encoders)
+ENCODINGS = ("digits", "radix", "bigint", "huffman")
+
+# Encodings whose payload can only be computed from the whole input; the
+# streaming, parallel and ASCII fast paths fall back to encode_string()
+WHOLE_INPUT_ENCODINGS = ("bigint",)
+
+# Encodings the chunked layout can use: their tables are built without the
+# character counts of the source, so an unchanged chunk encodes the same
+CHUNKED_ENCODINGS = ("digits", "radix")
+
+# Compression applied to the source before it is glyph-encoded; "auto"
+# picks the compressor (see Kannadafy.utils.compression)
+COMPRESSIONS = ("zlib", "bz2", "lzma", "auto")
+
+# Bytes read per step by the streaming encoder
+STREAM_CHUNK_SIZE = 1 << 18
+
+# Smallest piece of source (in characters) handed to a worker process
+PARALLEL_MIN_CHUNK = 1 << 16
+
+# Backends for the payload kernel; "auto" uses NumPy (when importable)
+# for inputs of at least NUMPY_THRESHOLD characters, and only where it is
+# measurably faster: the radix encoding with single-code-point glyphs
+# (10M characters, Kannada: 1.1s -> 0.6s). The digits kernel is no faster
+# (1.45s vs 1.35s) and glyphs of several code points make NumPy slower for
+# both encodings (food words: digits 1.5s -> 4.6s, radix 1.5s -> 3.1s)
+BACKENDS = ("auto", "python", "numpy")
+NUMPY_THRESHOLD = 1 << 16
+
+# Characters rendered per NumPy block, bounding the temporary arrays
+NUMPY_BLOCK_SIZE = 1 << 20
+
+# What script_type="auto" minimises: the estimated output size in bytes, or
+# the number of glyphs the stub has to decode
+AUTO_CRITERIA = ("size", "speed")
+
+# Character frequencies, which pick the glyph assignment, are counted over
+# the first COUNT_EXACT_PREFIX characters and one in COUNT_SAMPLE_STEP after
+COUNT_EXACT_PREFIX = 1 << 16
+COUNT_SAMPLE_STEP = 64
+
 def validate_mapping(characters: List[str]) -> bool:
     """Validate if the mapping has enough unique characters."""
+    if isinstance(characters, Alphabet):
+        # Validated when it was built
+        return True
     if len(characters) < 10:
         raise ValueError("Mapping must contain at least 10 unique characters")
     if len(characters) != len(set(characters)):
@@ -137,28 +209,1075 @@ def get_available_scripts() -> List[str]:
     """Get list of available predefined script types."""
     return list(CHARACTER_SETS.keys())
 
+@functools.lru_cache(maxsize=None)
+def get_alphabet(script_type: str) -> Alphabet:
+    """Get the compiled Alphabet of a predefined script type, built once per process."""
+    if script_type not in CHARACTER_SETS:
+        raise ValueError(f"Unknown alphabet type: {script_type}")
+    return Alphabet(CHARACTER_SETS[script_type], script_type)
+
 def chunk_string(in_s, n):
     """Chunk string to max length of n."""
     return "\n".join(
         "{}\\".format(in_s[i: i + n]) for i in range(0, len(in_s), n)
     ).rstrip("\\")
 
-def encode_string(in_s, alphabet):
-    """Convert input string to encoded output string with the given alphabet."""
-    d1 = dict(enumerate(alphabet))
-    d2 = {v: k for k, v in d1.items()}
-    return (
-        'exec("".join(map(chr,[int("".join(str({}[i]) for i in x.split())) for x in\n'
-        '"{}"\n.split("  ")])))\n'.format(
-            pformat(d2),
-            chunk_string(
-                "  ".join(" ".join(d1[int(i)] for i in str(ord(c))) for c in in_s),
-                MAX_STR_LEN,
-            ),
+def _literal_glyphs(alphabet):
+    """Glyphs that can sit inside the payload literal (see Kannadafy.alphabet.literal_glyphs)."""
+    if isinstance(alphabet, Alphabet):
+        return list(alphabet.literal)
+    return literal_glyphs(alphabet)
+
+# str.translate table escaping what a bytes literal cannot hold as is,
+# applied to the UTF-8 bytes of the payload read as latin-1
+_BYTES_ESCAPES = {b: "\\x{:02x}".format(b) for b in [*range(32), *range(127, 256)]}
+
+def _escape_bytes(text):
+    """Body of a bytes literal holding the UTF-8 encoding of text."""
+    return text.encode("utf-8").decode("latin-1").translate(_BYTES_ESCAPES)
+
+def _layout_parts(layout):
+    """Return (line width or None, line joiner, escape function) of a layout."""
+    if layout in ("concat", "chunked"):
+        return CONCAT_STR_LEN, '"\n"', None
+    if layout == "continuation":
+        return MAX_STR_LEN, "\\\n", None
+    if layout == "single":
+        return None, "", None
+    if layout == "bytes":
+        return CONCAT_STR_LEN, '"\nb"', _escape_bytes
+    raise ValueError(f"Unknown layout: {layout}. Available layouts: {', '.join(LAYOUTS)}")
+
+def _layout_stub(encoder, layout):
+    """Return the header and footer of encoder adapted to a layout."""
+    if layout == "bytes":
+        # The literal is opened by the last character of the header and
+        # closed by the first one of the footer
+        return encoder.header[:-1] + 'b"', '".decode()' + encoder.footer[1:]
+    return encoder.header, encoder.footer
+
+def _layout_payload(payload, layout):
+    """Write a whole payload the way the layout lays it out."""
+    n, joiner, escape = _layout_parts(layout)
+    lines = [payload] if n is None else [payload[i: i + n] for i in range(0, len(payload), n)]
+    return joiner.join(map(escape, lines) if escape else lines)
+
+def _layout_chunks(encoder, in_s):
+    """Encode the content-defined chunks of in_s, each starting a new line."""
+    from Kannadafy.utils.chunking import content_chunks
+
+    lines = []
+    for i, chunk in enumerate(content_chunks(in_s)):
+        piece = encoder.encode_piece(chunk)
+        lines.append(_layout_payload(piece if i == 0 else encoder.separator + piece, "concat"))
+    return '"\n"'.join(lines)
+
+def _encode_payload(encoder, in_s, layout):
+    """Encode in_s and lay the payload out."""
+    if layout == "chunked":
+        return _layout_chunks(encoder, in_s)
+    return _layout_payload(encoder.encode_piece(in_s), layout)
+
+def _payload_counts(in_s, encoding, layout):
+    """Character counts to build the encoder of in_s from (see _char_counts).
+
+    in_s can also be a list of texts that share the encoder. The chunked
+    layout uses none, so that the tables do not change with the source.
+    """
+    if layout != "chunked":
+        return _char_counts(in_s if isinstance(in_s, list) else [in_s])
+    if encoding not in CHUNKED_ENCODINGS:
+        raise ValueError(f"The chunked layout needs one of the encodings: {', '.join(CHUNKED_ENCODINGS)}")
+    return None
+
+def _prefix_free_glyphs(alphabet):
+    """Select the glyphs that can be concatenated without separators.
+
+    See Kannadafy.alphabet.separable_glyphs; an Alphabet has them already.
+    """
+    glyphs = list(alphabet.separable) if isinstance(alphabet, Alphabet) else separable_glyphs(alphabet)
+    if len(glyphs) < 2:
+        raise ValueError("Mapping needs at least 2 glyphs usable without separators")
+    return glyphs
+
+def _compact_repr(mapping):
+    """Serialize a dict as a one-line literal, keeping its insertion order."""
+    return "{" + ",".join("{!r}:{!r}".format(k, v) for k, v in mapping.items()) + "}"
+
+def _glyph_tokens_expr(glyphs):
+    """Stub code around the payload literal that splits it back into glyphs.
+
+    Returns the text to write before and after the literal.
+    """
+    if all(len(g) == 1 for g in glyphs):
+        return "", ""
+    pattern = "|".join(re.escape(g) for g in sorted(glyphs, key=len, reverse=True))
+    return '__import__("re").findall({!r},'.format(pattern), ")"
+
+class _FragmentTable(dict):
+    """str.translate table mapping code points to their encoded fragments.
+
+    ASCII is filled in up front; any other code point is encoded the first
+    time it is looked up and kept for later calls.
+    """
+
+    def __init__(self, fragment, separator=""):
+        super().__init__()
+        self.fragment = fragment
+        self.separator = separator
+        for cp in range(128):
+            self[cp] = fragment(cp) + separator
+
+    def __missing__(self, cp):
+        value = self[cp] = self.fragment(cp) + self.separator
+        return value
+
+@functools.lru_cache(maxsize=32)
+def _digits_table(digit_glyphs):
+    """Translate table spelling each code point with the ten digit glyphs."""
+    return _FragmentTable(lambda cp: " ".join(digit_glyphs[int(i)] for i in str(cp)), "  ")
+
+@functools.lru_cache(maxsize=32)
+def _radix_table(glyphs, width):
+    """Translate table writing each code point as `width` base-len(glyphs) digits."""
+    base = len(glyphs)
+
+    def fragment(cp):
+        digits = []
+        for _ in range(width):
+            cp, d = divmod(cp, base)
+            digits.append(glyphs[d])
+        return "".join(reversed(digits))
+
+    return _FragmentTable(fragment)
+
+def _numpy():
+    """Return the numpy module, or None when it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def _use_numpy(in_s, backend, glyphs=None):
+    """Decide whether the NumPy kernel should encode in_s.
+
+    glyphs are those of an encoding whose NumPy kernel can win (see
+    BACKENDS); None means "auto" always keeps the Python kernel.
+    """
+    if backend == "python":
+        return False
+    if backend == "numpy":
+        if _numpy() is None:
+            raise ValueError("The numpy backend requires NumPy to be installed")
+        return True
+    if backend != "auto":
+        raise ValueError(f"Unknown backend: {backend}. Available backends: {', '.join(BACKENDS)}")
+    if glyphs is None or any(len(glyph) != 1 for glyph in glyphs):
+        return False
+    return len(in_s) >= NUMPY_THRESHOLD and _numpy() is not None
+
+def _numpy_render(np, tokens, symbols):
+    """Turn an array of symbol indices into the string of those symbols."""
+    codes = [np.frombuffer(sym.encode("utf-32-le"), dtype="<u4") for sym in symbols]
+    flat = np.concatenate(codes)
+    if len(flat) == len(symbols):
+        # Every symbol is a single code point: a plain gather will do
+        return flat[tokens].tobytes().decode("utf-32-le")
+
+    lens = np.array([len(c) for c in codes], dtype=np.int64)
+    starts = np.concatenate(([0], np.cumsum(lens)[:-1]))
+    out_lens = lens[tokens]
+    out_starts = np.cumsum(out_lens) - out_lens
+    index = np.repeat(starts[tokens] - out_starts, out_lens) + np.arange(int(out_lens.sum()))
+    return flat[index].tobytes().decode("utf-32-le")
+
+def _numpy_digits_tokens(np, in_s):
+    """Digits payload of in_s as arrays of symbol indices (10 is a space), one per block."""
+    blocks = []
+    for i in range(0, len(in_s), NUMPY_BLOCK_SIZE):
+        cps = np.frombuffer(in_s[i: i + NUMPY_BLOCK_SIZE].encode("utf-32-le"), dtype="<u4")
+        width = len(str(int(cps.max())))
+        # One row per character: each zero-padded digit followed by a
+        # space, then one more space; leading zeros are masked out below
+        rows = np.full((len(cps), 2 * width + 1), 10, dtype=np.uint8)
+        keep = np.ones(rows.shape, dtype=bool)
+        for k in range(width):
+            power = 10 ** (width - 1 - k)
+            rows[:, 2 * k] = cps // power % 10
+            keep[:, 2 * k] = keep[:, 2 * k + 1] = cps >= power
+        # Zero itself still has one digit
+        keep[:, 2 * width - 2] = keep[:, 2 * width - 1] = True
+        blocks.append(rows[keep])
+    return blocks
+
+def _numpy_radix_tokens(np, in_s, base, width):
+    """Radix payload of in_s as arrays of digit values, one per block."""
+    blocks = []
+    for i in range(0, len(in_s), NUMPY_BLOCK_SIZE):
+        cps = np.frombuffer(in_s[i: i + NUMPY_BLOCK_SIZE].encode("utf-32-le"), dtype="<u4").astype(np.int64)
+        tokens = np.empty((len(cps), width), dtype=np.int64)
+        for k in range(width - 1, -1, -1):
+            cps, tokens[:, k] = np.divmod(cps, base)
+        blocks.append(tokens.ravel())
+    return blocks
+
+# Parts of an encoding: the stub text before and after the payload literal,
+# a function encoding a piece of source, the separator written between two
+# encoded pieces, the code point -> fragment(+separator) translate table
+# and the digit value -> glyph assignment of the stub's table.
+# encode_piece(s) is render(symbols(s)): symbols() computes the part of the
+# work that does not depend on the glyphs, so encoders with equal
+# stream_key can share it (see encode_fanout). Encoder plugins return one
+# too, with table None when the payload is not made of per-character
+# fragments (see Kannadafy.encoders)
+Encoder = collections.namedtuple(
+    "Encoder", "header encode_piece separator footer table assignment symbols render stream_key"
+)
+
+def _digits_encoder(alphabet, counts=None, backend="auto", codec="utf-8"):
+    """Build the header, piece encoder, separator and footer of the digits encoding.
+
+    counts (character -> occurrences, None meaning any character may occur)
+    decides which ten glyphs spell the digits, the most frequent digits
+    getting the glyphs with the shortest UTF-8 form, and the stub's table
+    only holds the digits that are needed.
+    """
+    from Kannadafy.utils.glyph_cost import assign_glyphs, digit_histogram
+
+    candidates = _literal_glyphs(alphabet)
+    if len(candidates) < 10:
+        raise ValueError("The digits encoding needs 10 glyphs without quotes, backslashes or whitespace")
+    histogram = [1] * 10 if counts is None else digit_histogram(counts, 10)
+    glyphs = assign_glyphs(histogram, candidates)
+    table = _digits_table(tuple(glyphs))
+
+    def symbols(in_s):
+        if in_s and _use_numpy(in_s, backend):
+            return _numpy_digits_tokens(_numpy(), in_s)
+        return in_s
+
+    def render(symbols):
+        if isinstance(symbols, str):
+            # Every fragment carries a trailing separator; drop the last one
+            return symbols.translate(table)[:-2]
+        np, alphabet = _numpy(), list(glyphs) + [" "]
+        return "".join(_numpy_render(np, tokens, alphabet) for tokens in symbols)[:-2]
+
+    assignment = {d: glyphs[d] for d, n in enumerate(histogram) if n}
+    header = (
+        'exec("".join(map(chr,[int("".join(map({}.__getitem__,x.split()))) for x in\n'
+        '"'.format(_compact_repr({g: str(d) for d, g in assignment.items()}))
+    )
+    return Encoder(header, lambda in_s: render(symbols(in_s)), "  ", '"\n.split("  ")])))\n', table,
+                    assignment, symbols, render, ("digits",))
+
+def _radix_encoder(alphabet, counts=None, backend="auto", codec="utf-8"):
+    """Build the header, piece encoder, separator and footer of the radix encoding.
+
+    Unlike the digits encoding, no separators are written: every character
+    costs `width` glyphs of a prefix-free alphabet. With counts (character
+    -> occurrences) the base, width and digit glyphs are chosen for the
+    smallest payload and the stub's table only holds the digits needed;
+    None means any character may occur and the whole alphabet is used.
+    """
+    from Kannadafy.utils.glyph_cost import choose_radix, digit_histogram
+    from Kannadafy.utils.radix import digit_width
+
+    glyphs = _prefix_free_glyphs(alphabet)
+    if counts is None:
+        width = digit_width(len(glyphs), 0x10FFFF)
+        used = range(len(glyphs))
+    else:
+        width, glyphs = choose_radix(counts, glyphs)
+        used = [d for d, n in enumerate(digit_histogram(counts, len(glyphs), width)) if n]
+    base = len(glyphs)
+    table = _radix_table(tuple(glyphs), width)
+    assignment = {d: glyphs[d] for d in used}
+
+    def symbols(in_s):
+        if in_s and _use_numpy(in_s, backend, glyphs):
+            return _numpy_radix_tokens(_numpy(), in_s, base, width)
+        return in_s
+
+    def render(symbols):
+        if isinstance(symbols, str):
+            return symbols.translate(table)
+        np = _numpy()
+        return "".join(_numpy_render(np, tokens, glyphs) for tokens in symbols)
+
+    tokens_open, tokens_close = _glyph_tokens_expr(list(assignment.values()))
+    header = (
+        'exec("".join(map(chr,__import__("functools").reduce(lambda a,b:[x*{}+y for x,y in zip(a,b)],\n'
+        '(lambda v:[v[j::{}] for j in range({})])(list(map({}.__getitem__,{}\n"'.format(
+            base, width, width, _compact_repr({g: d for d, g in assignment.items()}), tokens_open
         )
     )
+    return Encoder(header, lambda in_s: render(symbols(in_s)), "", '"\n{})))))))\n'.format(tokens_close), table,
+                    assignment, symbols, render, ("radix", base, width))
+
+def _bigint_encoder(alphabet, counts=None, backend="auto", codec="utf-8"):
+    """Build the header, encoder and footer of the bigint encoding.
+
+    The bytes of the whole source in codec (latin-1 for text that holds
+    compressed bytes), behind a 0x01 marker byte that keeps leading zero
+    bytes, are read as one integer and written in base len(glyphs). The
+    stub rebuilds the integer by combining digit pairs, then pairs of pairs
+    and so on, so both directions stay subquadratic. The base is the number
+    of cheap glyphs that gives the fewest bytes.
+    """
+    from Kannadafy.utils.glyph_cost import choose_bigint_glyphs
+    from Kannadafy.utils.radix import bytes_to_base
+
+    glyphs = choose_bigint_glyphs(_prefix_free_glyphs(alphabet))
+    base = len(glyphs)
+
+    def symbols(in_s):
+        return bytes_to_base(b"\x01" + in_s.encode(codec), base)
+
+    def render(digits):
+        return "".join(map(glyphs.__getitem__, digits))
+
+    tokens_open, tokens_close = _glyph_tokens_expr(glyphs)
+    header = (
+        'exec((lambda x:x.to_bytes((x.bit_length()+7)//8,"big")[1:].decode("{}"))'
+        '((lambda d:__import__("functools").reduce(\n'
+        'lambda s,_:(lambda v:([a*s[1]+b for a,b in zip(v[::2],v[1::2])],s[1]*s[1]))([0]*(len(s[0])%2)+s[0]),\n'
+        'range((len(d)-1).bit_length()),(d,{}))[0][0])(list(map({}.__getitem__,{}\n"'.format(
+            codec, base, _compact_repr({g: i for i, g in enumerate(glyphs)}), tokens_open
+        )
+    )
+    return Encoder(header, lambda in_s: render(symbols(in_s)), None, '"\n{})))))\n'.format(tokens_close), None,
+                    dict(enumerate(glyphs)), symbols, render, ("bigint", base))
+
+def _char_counts(pieces, seen=None):
+    """Count how often each character occurs in the concatenated pieces.
+
+    Past COUNT_EXACT_PREFIX characters only one in COUNT_SAMPLE_STEP is
+    counted; characters that are never sampled count once. The counts only
+    depend on the text, not on how it is cut into pieces, so every encoding
+    path makes the same choices. seen, the set of characters of the text,
+    can be passed when it is already known.
+    """
+    counts, pos = collections.Counter(), 0
+    collect = seen is None
+    seen = set() if collect else seen
+    for piece in pieces:
+        head = min(len(piece), max(0, COUNT_EXACT_PREFIX - pos))
+        counts.update(piece[:head])
+        counts.update(piece[head - (pos + head) % -COUNT_SAMPLE_STEP::COUNT_SAMPLE_STEP])
+        if collect:
+            seen.update(piece)
+        pos += len(piece)
+    for c in seen.difference(counts):
+        counts[c] = 1
+    return counts
+
+def _fill_report(report, encoding, encoder):
+    """Record the encoding and glyph assignment of encoder in report."""
+    if report is not None:
+        report["encoding"] = encoding
+        report["assignment"] = dict(encoder.assignment)
+
+def _huffman_encoder(alphabet, counts, backend="auto", codec="utf-8"):
+    """Build the header, piece encoder, separator and footer of the huffman encoding.
+
+    Every character is written as its codeword in a Huffman code over the
+    prefix-free glyphs built from counts, so frequent characters take one
+    glyph and no separators are needed. The codewords are prefix-free as
+    strings too, so the stub splits the payload with a single regex.
+    """
+    from Kannadafy.utils.huffman import choose_huffman
+
+    if counts is None:
+        raise ValueError("The huffman encoding needs the character counts of the input")
+    codewords, assignment = choose_huffman(counts, _prefix_free_glyphs(alphabet))
+    # The code only covers characters of the input it was built for
+    table = _FragmentTable(lambda cp: codewords.get(chr(cp), ""))
+
+    def render(in_s):
+        return in_s.translate(table)
+
+    # Most frequent characters first: the regex tries alternatives in order
+    ordered = sorted(codewords, key=lambda c: (-counts[c], c))
+    # An empty source gets a pattern that never matches
+    pattern = "|".join(re.escape(codewords[c]) for c in ordered) or "(?!)"
+    header = 'exec("".join(map({}.__getitem__,__import__("re").findall({!r},\n"'.format(
+        _compact_repr({codewords[c]: c for c in ordered}), pattern
+    )
+    # The symbols are the source itself: the code changes with the glyphs
+    return Encoder(header, render, "", '"\n))))\n', table, assignment, lambda in_s: in_s, render, ("huffman",))
+
+def _get_encoder(alphabet, encoding, counts=None, backend="auto", codec="utf-8"):
+    """Return the Encoder of an encoding, built-in or plugin (see Kannadafy.encoders).
+
+    counts maps the characters of the input to how often they occur (see
+    _char_counts); None makes an encoder able to encode any character.
+    codec is how encodings of bytes (bigint) turn the input into bytes.
+    """
+    from Kannadafy.encoders import load_encoder
+
+    return load_encoder(encoding)(alphabet, counts, backend, codec)
+
+def _whole_input(encoding):
+    """Whether the payload of encoding can only be computed from the whole input."""
+    if encoding in ENCODINGS:
+        return encoding in WHOLE_INPUT_ENCODINGS
+    from Kannadafy.encoders import is_whole_input
+
+    return is_whole_input(encoding)
+
+def _compress_source(in_s, compress, report=None, zdict=None, codec="utf-8"):
+    """Apply the compression stage to a source.
+
+    The source, turned into bytes with codec, is compressed and the
+    compressed bytes are returned as a latin-1 string, which every encoding
+    can carry. The method ("none"
+    when "auto" finds nothing to gain) and the sizes before and after are
+    recorded in report under "compression". zdict is a shared zlib
+    dictionary (see build_zdict in Kannadafy.utils.compression).
+
+    Returns:
+        tuple: (text to encode, codec of that text, (text before, text
+        after) the decode expression of the stub or None)
+    """
+    if not compress:
+        return in_s, codec, None
+    from Kannadafy.utils.compression import choose_compressor, compress_bytes, decompress_expr
+
+    if compress not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compress}. Available compressions: {', '.join(COMPRESSIONS)}")
+    data = in_s.encode(codec)
+    if compress == "auto":
+        method, compressed = choose_compressor(data, zdict)
+    else:
+        method, compressed = compress, compress_bytes(data, compress, zdict)
+    shared = bool(zdict) and method == "zlib"
+    if report is not None:
+        report["compression"] = {"method": method or "none", "size": len(data), "compressed": len(compressed),
+                                 "shared_dictionary": shared}
+    if method is None:
+        return in_s, codec, None
+    return compressed.decode("latin-1"), "latin-1", decompress_expr(method, shared, codec)
+
+def _whitespace_source(in_s, report=None):
+    """Apply the whitespace run-length stage to a source.
+
+    The number of characters before and after, and the number of escapes,
+    are recorded in report under "whitespace".
+
+    Returns:
+        tuple: (text to encode, (text before, text after) the expression
+        that expands it in the stub, or None when nothing was escaped)
+    """
+    from Kannadafy.utils.whitespace import encode_whitespace, expand_expr
+
+    text, table = encode_whitespace(in_s)
+    if report is not None:
+        report["whitespace"] = {"size": len(in_s), "encoded": len(text), "escapes": len(table)}
+    return text, expand_expr(table) if table else None
+
+def _tokens_source(in_s, report=None):
+    """Apply the token dictionary stage to a source.
+
+    The number of characters before and after, and the number of names in
+    the dictionary, are recorded in report under "tokens".
+
+    Returns:
+        tuple: (text to encode, (text before, text after) the expression
+        that expands it in the stub, or None when nothing was replaced)
+    """
+    from Kannadafy.utils.tokens import encode_tokens
+    from Kannadafy.utils.whitespace import expand_expr
+
+    text, table = encode_tokens(in_s)
+    if report is not None:
+        report["tokens"] = {"size": len(in_s), "encoded": len(text), "names": len(table)}
+    return text, expand_expr(table) if table else None
+
+def _minify_source(in_s, minify, report=None):
+    """Apply the minify stage to a source.
+
+    minify is True or a dict of keyword arguments for minify_source. The
+    number of characters before and after are recorded in report under
+    "minify". Nothing has to be undone in the stub.
+    """
+    from Kannadafy.utils.minify import minify_source
+
+    text = minify_source(in_s, **(minify if isinstance(minify, dict) else {}))
+    if report is not None:
+        report["minify"] = {"size": len(in_s), "minified": len(text)}
+    return text
+
+def _xor_source(in_s, codec, xor_key, report=None):
+    """Apply the keystream XOR stage to a source (or its compressed form).
+
+    xor_key is the key as str or bytes, or True for a random one; it is
+    written in the stub. The number of bytes XORed is recorded in report
+    under "xor".
+
+    Returns:
+        tuple: (text to encode, "latin-1", (text before, text after) the
+        expression that undoes the stage in the stub)
+    """
+    from Kannadafy.utils.keystream import as_key, new_key, unxor_expr, xor_keystream
+
+    key = new_key() if xor_key is True else as_key(xor_key)
+    data = in_s.encode(codec)
+    if report is not None:
+        report["xor"] = {"size": len(data), "key_size": len(key)}
+    return xor_keystream(data, key).decode("latin-1"), "latin-1", unxor_expr(key, codec)
+
+def _stage_pipeline(compress=None, whitespace=False, tokens=False, minify=False, xor_key=None, pipeline=None):
+    """Return the Pipeline of the stage arguments, or pipeline.
+
+    pipeline is a Kannadafy.pipeline.Pipeline, or a spec or pipeline file
+    (see Pipeline.load); it cannot be combined with the other arguments.
+    """
+    from Kannadafy.pipeline import Pipeline
+
+    if pipeline is None:
+        return Pipeline.from_options(compress, whitespace, tokens, minify, xor_key)
+    if compress or whitespace or tokens or minify or xor_key:
+        raise ValueError("A pipeline cannot be combined with the compress, whitespace, tokens, minify or xor_key "
+                         "options")
+    return Pipeline.load(pipeline) if isinstance(pipeline, str) else pipeline
+
+def _prepare_source(in_s, compress=None, whitespace=False, report=None, zdict=None, tokens=False, minify=False,
+                    xor_key=None, pipeline=None):
+    """Run the stages a source goes through before it is glyph-encoded.
+
+    Returns:
+        tuple: (text to encode, codec of that text, list of the (text
+        before, text after) pairs the stub puts around its decode
+        expression, in the order the stages were applied)
+    """
+    return _stage_pipeline(compress, whitespace, tokens, minify, xor_key, pipeline).prepare(in_s, report, zdict)
+
+def _wrap_stub(header, footer, wraps):
+    """Put the stage expressions of wraps around the expression a stub passes to exec.
+
+    The last stage applied is undone first, so its text goes innermost.
+    """
+    opening = "".join(wrap[0] for wrap in wraps)
+    closing = "".join(wrap[1] for wrap in reversed(wraps))
+    return "exec(" + opening + header[len("exec("):], footer[:-len(")\n")] + closing + ")\n"
+
+def encode_string(in_s, alphabet, encoding="digits", backend="auto", report=None, layout=DEFAULT_LAYOUT,
+                  compress=None, zdict=None, whitespace=False, tokens=False, minify=False, xor_key=None,
+                  pipeline=None):
+    """Convert input string to encoded output string with the given alphabet.
+
+    Args:
+        in_s (str): Source code to encode
+        alphabet (list or Alphabet): Glyphs to encode with
+        encoding (str): "digits" spells the decimal digits of each code point
+            with the first ten glyphs; "radix" writes fixed-width numbers in
+            base len(alphabet) with no separators; "bigint" writes the whole
+            UTF-8 source as one number in base len(alphabet); "huffman"
+            writes each character as its codeword in a Huffman code built
+            from the character frequencies of in_s
+        backend (str): Payload kernel, "python", "numpy" or "auto" (NumPy
+            for the radix encoding with single-code-point glyphs when it is
+            installed and the input is at least NUMPY_THRESHOLD characters,
+            see BACKENDS); all backends produce identical output
+        report (dict, optional): Receives the encoding and the digit value
+            -> glyph assignment chosen for in_s
+        layout (str): How the payload literal is laid out, one of LAYOUTS;
+            "chunked" needs one of CHUNKED_ENCODINGS
+        compress (str, optional): Compress the UTF-8 source with one of
+            COMPRESSIONS first and encode the compressed bytes; the stub
+            decompresses them before running the source
+        zdict (bytes, optional): Shared zlib dictionary to compress against;
+            the output then reads it from a file next to it (see
+            Kannadafy.utils.compression.ZDICT_FILENAME)
+        whitespace (bool): Replace indentation and runs of spaces with
+            escape characters first; the stub expands them after decoding
+        tokens (bool): Replace the most frequent names (keywords, builtins,
+            identifiers) with escape characters before any other stage; the
+            dictionary is written in the stub
+        minify (bool or dict): Strip comments, docstrings, trailing
+            whitespace and blank lines before any other stage; a dict is
+            passed to minify_source (keep_docstrings, indent)
+        xor_key (str or bytes, optional): XOR the (compressed) source with
+            a shake_256 keystream of this key, True for a random key, after
+            every other stage; the key is written in the stub
+        pipeline (Pipeline or str, optional): Stages to run instead of the
+            ones above, in any order (see Kannadafy.pipeline); a str is a
+            spec or the path of a pipeline file
+
+    The stages, the encoding and the stub are the steps of a
+    Kannadafy.pipeline.Pipeline; with a report, each records its time and
+    sizes under "stages".
+    """
+    pipeline = _stage_pipeline(compress, whitespace, tokens, minify, xor_key, pipeline)
+    return pipeline.encode(in_s, alphabet, encoding, backend, layout, report, zdict)
+
+class _PayloadWriter:
+    """Write payload pieces to a file, laid out exactly like _layout_payload."""
+
+    def __init__(self, f, layout=DEFAULT_LAYOUT):
+        self.f = f
+        self.n, self.joiner, self.escape = _layout_parts(layout)
+        self.pending = ""
+
+    def write(self, piece):
+        if self.n is None:
+            self.f.write(self.escape(piece) if self.escape else piece)
+            return
+        pending = self.pending + piece
+        # Keep the last (possibly full) line back: only lines that are
+        # followed by more payload get a joiner.
+        n = self.n
+        cut = (len(pending) - 1) // n * n if pending else 0
+        if cut:
+            lines = [pending[i: i + n] for i in range(0, cut, n)]
+            if self.escape:
+                lines = list(map(self.escape, lines))
+            self.f.write(self.joiner.join(lines) + self.joiner)
+        self.pending = pending[cut:]
+
+    def close(self):
+        self.f.write(self.escape(self.pending) if self.escape else self.pending)
+        self.pending = ""
+
+def _iter_decoded(input_filepath, chunk_size):
+    """Yield the text of a UTF-8 file in chunks of about chunk_size bytes."""
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+    with open(input_filepath, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            text = decoder.decode(data, final=not data)
+            if text:
+                yield text
+            if not data:
+                break
 
-def obfuscate(input_filepath, output_filepath, kannada=True, mapping_file=None, custom_alphabet=None, text_files=None, script_type="kannada"):
+def encode_file(input_filepath, output_filepath, alphabet, encoding="digits", chunk_size=STREAM_CHUNK_SIZE,
+                report=None, layout=DEFAULT_LAYOUT):
+    """Encode a file to an obfuscated script without loading it into memory.
+
+    The input is decoded incrementally and payload lines are written as they
+    are produced, so memory use depends on chunk_size, not on the file size.
+    The output is identical to writing encode_string() of the whole file.
+    Encodings in WHOLE_INPUT_ENCODINGS (or plugins that say so), and the
+    chunked layout, cannot be streamed and are encoded in one go.
+    """
+    if _whole_input(encoding) or layout == "chunked":
+        with open(input_filepath, 'r', encoding='utf-8') as f:
+            obfuscated_content = encode_string(f.read(), alphabet, encoding, report=report, layout=layout)
+        with open(output_filepath, 'w', encoding='utf-8') as f:
+            f.write(obfuscated_content)
+        return
+
+    # The stub header depends on which characters occur, so scan first
+    encoder = _get_encoder(alphabet, encoding, _char_counts(_iter_decoded(input_filepath, chunk_size)))
+    _fill_report(report, encoding, encoder)
+    header, footer = _layout_stub(encoder, layout)
+    with open(output_filepath, 'w', encoding='utf-8') as f:
+        f.write(header)
+        writer = _PayloadWriter(f, layout)
+        first = True
+        for text in _iter_decoded(input_filepath, chunk_size):
+            piece = encoder.encode_piece(text)
+            writer.write(piece if first else encoder.separator + piece)
+            first = False
+        writer.close()
+        f.write(footer)
+
+def _scan_ascii(mm, chunk_size):
+    """Return the character counts (see _char_counts) of a mapped file if it is plain ASCII.
+
+    Files with non-ASCII bytes, or with carriage returns (which text mode
+    would translate), return None so the caller can use the normal path.
+    """
+    present, absent = set(), set(range(128))
+    for i in range(0, len(mm), chunk_size):
+        chunk = mm[i: i + chunk_size]
+        if not chunk.isascii() or b"\r" in chunk:
+            return None
+        # A byte search per value not seen yet is cheaper than a set of the chunk
+        found = [b for b in absent if chunk.find(b) >= 0]
+        present.update(found)
+        absent.difference_update(found)
+    pieces = (mm[i: i + chunk_size].decode('ascii') for i in range(0, len(mm), chunk_size))
+    return _char_counts(pieces, {chr(b) for b in present})
+
+def encode_ascii_file(input_filepath, output_filepath, alphabet, encoding="digits", chunk_size=STREAM_CHUNK_SIZE,
+                      report=None, layout=DEFAULT_LAYOUT):
+    """Encode a pure-ASCII file straight from a memory map.
+
+    Each byte is looked up in a 128-entry table of UTF-8 encoded fragments,
+    so no str of the whole file is ever built. The output is identical to
+    encode_string() of the file.
+
+    Returns:
+        bool: False (and writes nothing) if the file is empty or not plain
+        ASCII, or the layout is chunked, so the caller should fall back to
+        the normal path
+    """
+    if _whole_input(encoding) or layout == "chunked" or os.path.getsize(input_filepath) == 0:
+        return False
+
+    with open(input_filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        counts = _scan_ascii(mm, chunk_size)
+        if counts is None:
+            return False
+
+        encoder = _get_encoder(alphabet, encoding, counts)
+        if encoder.table is None:
+            # Only encoders that write per-character fragments can use the byte table
+            return False
+        _fill_report(report, encoding, encoder)
+        # Separators go in front of each fragment (except the first one) so
+        # the last separator never needs to be taken back once written
+        sep = encoder.separator
+        fragments = [encoder.table[b][:len(encoder.table[b]) - len(sep)] for b in range(128)]
+        byte_table = [(sep + fragment).encode('utf-8') for fragment in fragments]
+
+        header, footer = _layout_stub(encoder, layout)
+        with open(output_filepath, 'w', encoding='utf-8') as out:
+            out.write(header)
+            writer = _PayloadWriter(out, layout)
+            writer.write(fragments[mm[0]])
+            for i in range(1, len(mm), chunk_size):
+                writer.write(b"".join(map(byte_table.__getitem__, mm[i: i + chunk_size])).decode('utf-8'))
+            writer.close()
+            out.write(footer)
+    return True
+
+# Encoder of the current worker process, set up once by _init_worker
+_worker_encoder = None
+
+def _init_worker(alphabet, encoding, counts):
+    """Build the encoder once in each worker process."""
+    global _worker_encoder
+    _worker_encoder = _get_encoder(alphabet, encoding, counts)
+
+def _encode_in_worker(in_s):
+    """Encode one piece of source in a worker process."""
+    return _worker_encoder.encode_piece(in_s)
+
+def encode_file_parallel(input_filepath, output_filepath, alphabet, encoding="digits", workers=None, report=None,
+                         layout=DEFAULT_LAYOUT):
+    """Encode a file by splitting its source across a pool of processes.
+
+    Every character encodes independently, so the source is cut into
+    pieces, encoded in parallel and the pieces are written in order with
+    the encoding's separator between them. Line wrapping is applied to the
+    stitched payload, so the output is identical to encode_string().
+    """
+    workers = workers or os.cpu_count() or 1
+    with open(input_filepath, 'r', encoding='utf-8') as f:
+        in_s = f.read()
+    if _whole_input(encoding) or layout == "chunked":
+        with open(output_filepath, 'w', encoding='utf-8') as f:
+            f.write(encode_string(in_s, alphabet, encoding, report=report, layout=layout))
+        return
+
+    counts = _char_counts([in_s])
+    encoder = _get_encoder(alphabet, encoding, counts)
+    _fill_report(report, encoding, encoder)
+    header, footer = _layout_stub(encoder, layout)
+    # A few pieces per worker keeps the pool busy while results are written
+    size = max(PARALLEL_MIN_CHUNK, -(-len(in_s) // (workers * 4)))
+    pieces = [in_s[i: i + size] for i in range(0, len(in_s), size)]
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(list(alphabet), encoding, counts)) as executor, \
+            open(output_filepath, 'w', encoding='utf-8') as f:
+        f.write(header)
+        writer = _PayloadWriter(f, layout)
+        for i, piece in enumerate(executor.map(_encode_in_worker, pieces)):
+            writer.write(piece if i == 0 else encoder.separator + piece)
+        writer.close()
+        f.write(footer)
+
+def _estimate_output(alphabet, encoding, counts, total, layout=DEFAULT_LAYOUT):
+    """Estimate the obfuscated output of a source from its character counts.
+
+    Fragments are looked up in the encoder's table instead of encoding the
+    source (bigint, which has no table, is estimated from log(256)/log(N)
+    glyphs per byte).
+
+    Args:
+        counts: Character counts of the source (see _char_counts)
+        total: Number of characters of the source; sampled counts are
+            scaled up to it
+
+    Returns:
+        tuple: (estimated size in bytes, estimated payload length in glyph
+        code points)
+    """
+    encoder = _get_encoder(alphabet, encoding, counts)
+    scale = total / max(1, sum(counts.values()))
+    width, joiner, escape = _layout_parts(layout)
+
+    def size(text):
+        return len(escape(text)) if escape else len(text.encode("utf-8"))
+
+    if encoder.table is not None:
+        chars = scale * sum(n * len(encoder.table[ord(c)]) for c, n in counts.items())
+        nbytes = scale * sum(n * size(encoder.table[ord(c)]) for c, n in counts.items())
+    else:
+        glyphs = list(encoder.assignment.values())
+        digits = 8 * (scale * sum(n * len(c.encode("utf-8")) for c, n in counts.items()) + 1) / math.log2(len(glyphs))
+        chars = digits * sum(map(len, glyphs)) / len(glyphs)
+        nbytes = digits * sum(map(size, glyphs)) / len(glyphs)
+    if width:
+        nbytes += chars / width * len(joiner)
+    header, footer = _layout_stub(encoder, layout)
+    return int(nbytes) + len((header + footer).encode("utf-8")), int(chars)
+
+def _auto_alphabet(input_filepath, encoding="digits", layout=DEFAULT_LAYOUT, criterion="size",
+                   candidate_files=None, report=None, compress=None, zdict=None, whitespace=False, tokens=False,
+                   minify=False, xor_key=None, pipeline=None):
+    """Pick the alphabet giving the smallest (or fastest to decode) output for a file.
+
+    Every CHARACTER_SETS entry and every mapping file in candidate_files is
+    a candidate; candidates that cannot be used with the encoding are
+    skipped. The choice, and the size estimated for every candidate, are
+    recorded in report under "script_type" and "estimates". With compress,
+    whitespace, tokens, minify, xor_key or pipeline, the candidates are
+    compared on the source those stages produce.
+
+    Returns:
+        Alphabet: The chosen alphabet
+    """
+    if criterion not in AUTO_CRITERIA:
+        raise ValueError(f"Unknown criterion: {criterion}. Available criteria: {', '.join(AUTO_CRITERIA)}")
+    lengths = []
+
+    def pieces():
+        for text in _iter_decoded(input_filepath, STREAM_CHUNK_SIZE):
+            lengths.append(len(text))
+            yield text
+
+    if compress or whitespace or tokens or minify or xor_key or pipeline:
+        with open(input_filepath, 'r', encoding='utf-8') as f:
+            text = _prepare_source(f.read(), compress, whitespace, zdict=zdict, tokens=tokens, minify=minify,
+                                   xor_key=xor_key, pipeline=pipeline)[0]
+        counts, lengths = _char_counts([text]), [len(text)]
+    else:
+        counts = _char_counts(pieces())
+    return _best_alphabet(counts, sum(lengths), encoding, layout, criterion, candidate_files, report)
+
+def _best_alphabet(counts, total, encoding="digits", layout=DEFAULT_LAYOUT, criterion="size",
+                   candidate_files=None, report=None):
+    """Pick the alphabet giving the smallest (or fastest to decode) output for a text.
+
+    counts are the character counts of the text (see _char_counts) and
+    total its length; the rest is as in _auto_alphabet.
+    """
+    if criterion not in AUTO_CRITERIA:
+        raise ValueError(f"Unknown criterion: {criterion}. Available criteria: {', '.join(AUTO_CRITERIA)}")
+    candidates = {name: get_alphabet(name) for name in CHARACTER_SETS}
+    for path in candidate_files or []:
+        path = os.path.normpath(path)
+        candidates[path] = Alphabet(load_custom_mapping(path), path)
+
+    estimates = {}
+    for name, alphabet in candidates.items():
+        try:
+            estimates[name] = _estimate_output(alphabet, encoding, counts, total, layout)
+        except ValueError:
+            continue
+    if not estimates:
+        raise ValueError(f"No candidate alphabet can be used with the {encoding} encoding")
+
+    if criterion == "size":
+        name = min(estimates, key=lambda n: estimates[n])
+    else:
+        name = min(estimates, key=lambda n: estimates[n][::-1])
+    if report is not None:
+        report["script_type"] = name
+        report["estimates"] = {n: estimate[0] for n, estimate in estimates.items()}
+    return candidates[name]
+
+def _resolve_alphabet(script_type="kannada", mapping_file=None, custom_alphabet=None, text_files=None):
+    """Return the Alphabet to obfuscate with.
+
+    The first of text_files, custom_alphabet (a list or an Alphabet),
+    mapping_file and script_type that is given decides. script_type "auto"
+    returns None: the alphabet is then chosen for each file (see
+    _auto_alphabet).
+    """
+    if text_files:
+        # Use text files for mapping
+        from Kannadafy.utils.text_obfuscation import get_text_file_words
+        alphabet = get_text_file_words(text_files)
+        if not alphabet:
+            raise ValueError("Could not generate sufficient mapping from text files")
+        return Alphabet(alphabet)
+    if custom_alphabet:
+        # Use provided custom alphabet
+        return Alphabet.of(custom_alphabet)
+    if mapping_file:
+        # Load mapping from file
+        return Alphabet(load_custom_mapping(mapping_file), mapping_file)
+    if script_type == "auto":
+        return None
+    # Use predefined character set
+    return get_alphabet(script_type)
+
+def fanout_output_path(output_filepath, name):
+    """Output path of one alphabet of a fan-out.
+
+    A "{script}" placeholder in output_filepath is replaced by name;
+    otherwise "_<name>" is added before the extension.
+    """
+    if "{script}" in output_filepath:
+        return output_filepath.replace("{script}", name)
+    base, ext = os.path.splitext(output_filepath)
+    return f"{base}_{name}{ext}"
+
+def output_diff(old_source, new_source, alphabet, encoding="digits", layout="chunked", **stages):
+    """Measure how much an obfuscated output changes when its source does.
+
+    Both versions are encoded with the same alphabet, encoding, layout and
+    stages (keyword arguments of encode_string) and compared line by line
+    (see Kannadafy.utils.chunking.diff_stats).
+
+    Returns:
+        dict: "source" and "output", the diff_stats of the two sources and
+        of their two outputs
+    """
+    from Kannadafy.utils.chunking import diff_stats
+
+    old_output = encode_string(old_source, alphabet, encoding, layout=layout, **stages)
+    new_output = encode_string(new_source, alphabet, encoding, layout=layout, **stages)
+    return {"source": diff_stats(old_source, new_source), "output": diff_stats(old_output, new_output)}
+
+def encode_fanout(in_s, alphabets, encoding="digits", backend="auto", layout=DEFAULT_LAYOUT, reports=None,
+                  compress=None, whitespace=False, tokens=False, minify=False, xor_key=None, pipeline=None):
+    """Encode one source with several alphabets.
+
+    The characters of in_s are counted once, and the part of the encoding
+    that does not depend on the glyphs is computed once per distinct
+    stream (every digits encoder shares one, radix encoders share one per
+    base and width) and then rendered with each alphabet.
+
+    Args:
+        in_s (str): Source code to encode
+        alphabets (dict): Name -> glyphs of each alphabet
+        encoding (str): Payload encoding, one of ENCODINGS or a plugin
+        backend (str): Payload kernel, see encode_string
+        layout (str): How the payload literal is laid out, one of LAYOUTS
+        reports (dict, optional): Receives a report (see encode_string) for
+            each name
+        compress (str, optional): Compression stage, see encode_string
+        whitespace (bool): Whitespace stage, see encode_string
+        tokens (bool): Token dictionary stage, see encode_string
+        minify (bool or dict): Minify stage, see encode_string
+        xor_key (str or bytes, optional): Keystream XOR stage, see
+            encode_string
+        pipeline (Pipeline or str, optional): Stages to run instead, see
+            encode_string
+
+    The stages run once for every alphabet.
+
+    Returns:
+        dict: Name -> obfuscated source
+    """
+    stage = {}
+    in_s, codec, wraps = _prepare_source(in_s, compress, whitespace, stage, tokens=tokens, minify=minify,
+                                         xor_key=xor_key, pipeline=pipeline)
+    counts = _payload_counts(in_s, encoding, layout)
+    streams, results = {}, {}
+    for name, alphabet in alphabets.items():
+        encoder = _get_encoder(alphabet, encoding, counts, backend, codec)
+        if reports is not None:
+            reports.setdefault(name, {}).update(stage)
+            _fill_report(reports[name], encoding, encoder)
+        header, footer = _wrap_stub(*_layout_stub(encoder, layout), wraps)
+        if layout == "chunked":
+            # Chunks are encoded one by one, so there is no stream to share
+            results[name] = header + _layout_chunks(encoder, in_s) + footer
+            continue
+        if encoder.stream_key not in streams:
+            streams[encoder.stream_key] = encoder.symbols(in_s)
+        results[name] = header + _layout_payload(encoder.render(streams[encoder.stream_key]), layout) + footer
+    return results
+
+def _render_to_file(output_filepath, alphabet, encoding, counts, backend, layout, symbols, codec="utf-8",
+                    wraps=()):
+    """Render a shared symbol stream with one alphabet and write the output file."""
+    encoder = _get_encoder(alphabet, encoding, counts, backend, codec)
+    header, footer = _wrap_stub(*_layout_stub(encoder, layout), wraps)
+    with open(output_filepath, 'w', encoding='utf-8') as f:
+        f.write(header + _layout_payload(encoder.render(symbols), layout) + footer)
+
+def obfuscate_fanout(input_filepath, outputs, alphabets=None, encoding="digits", layout=DEFAULT_LAYOUT,
+                     workers=None, report=None, compress=None, whitespace=False, tokens=False, minify=False,
+                     xor_key=None, pipeline=None):
+    """Obfuscate one Python script into several outputs, one per alphabet.
+
+    The source is read and analysed once and the glyph-independent part of
+    the encoding is shared, as in encode_fanout. With workers, the renders
+    run in that many processes, each writing its own output.
+
+    Args:
+        input_filepath (str): Path to the input Python script
+        outputs (dict): Alphabet name -> output path; names are script
+            types unless they are keys of alphabets
+        alphabets (dict, optional): Name -> glyphs of custom alphabets
+        encoding (str): Payload encoding, one of ENCODINGS or a plugin (default: "digits")
+        layout (str): How the payload literal is laid out, one of LAYOUTS
+        workers (int, optional): Render the outputs on this many processes
+        report (dict, optional): Receives a report for each name
+        compress (str, optional): Compression stage, see encode_string
+        whitespace (bool): Whitespace stage, see encode_string
+        tokens (bool): Token dictionary stage, see encode_string
+        minify (bool or dict): Minify stage, see encode_string
+        xor_key (str or bytes, optional): Keystream XOR stage, see
+            encode_string
+        pipeline (Pipeline or str, optional): Stages to run instead, see
+            encode_string
+
+    Returns:
+        dict: Alphabet name -> output path
+    """
+    resolved = {}
+    for name in outputs:
+        if alphabets and name in alphabets:
+            resolved[name] = alphabets[name]
+        else:
+            resolved[name] = get_alphabet(name)
+
+    with open(os.path.normpath(input_filepath), 'r', encoding='utf-8') as f:
+        in_s = f.read()
+
+    if not workers or workers < 2 or layout == "chunked":
+        results = encode_fanout(in_s, resolved, encoding, layout=layout, reports=report, compress=compress,
+                                whitespace=whitespace, tokens=tokens, minify=minify, xor_key=xor_key,
+                                pipeline=pipeline)
+        for name, obfuscated_content in results.items():
+            with open(os.path.normpath(outputs[name]), 'w', encoding='utf-8') as f:
+                f.write(obfuscated_content)
+        return dict(outputs)
+
+    stage = {}
+    in_s, codec, wraps = _prepare_source(in_s, compress, whitespace, stage, tokens=tokens, minify=minify,
+                                         xor_key=xor_key, pipeline=pipeline)
+    counts = _char_counts([in_s])
+    streams, jobs = {}, []
+    for name, alphabet in resolved.items():
+        encoder = _get_encoder(alphabet, encoding, counts, codec=codec)
+        if encoder.stream_key not in streams:
+            streams[encoder.stream_key] = encoder.symbols(in_s)
+        if report is not None:
+            report.setdefault(name, {}).update(stage)
+            _fill_report(report[name], encoding, encoder)
+        jobs.append((os.path.normpath(outputs[name]), list(alphabet), encoding, counts, "auto", layout,
+                     streams[encoder.stream_key], codec, wraps))
+    with ProcessPoolExecutor(min(workers, len(jobs))) as executor:
+        for future in [executor.submit(_render_to_file, *job) for job in jobs]:
+            future.result()
+    return dict(outputs)
+
+def obfuscate(input_filepath, output_filepath, kannada=True, mapping_file=None, custom_alphabet=None, text_files=None, script_type="kannada", encoding="digits", stream=False, workers=None,
+              report=None, layout=DEFAULT_LAYOUT, auto_criterion="size", candidate_files=None, compress=None,
+              whitespace=False, tokens=False, minify=False, xor_key=None, pipeline=None):
     """Obfuscate a Python script using Kannada letters or custom mapping.
 
     Args:
@@ -166,9 +1285,41 @@ def obfuscate(input_filepath, output_filepath, kannada=True, mapping_file=None,
         output_filepath (str): Path to write the obfuscated output
         kannada (bool): Whether to use Kannada letters (default: True) - DEPRECATED, use script_type instead
         mapping_file (str, optional): Path to a custom mapping file
-        custom_alphabet (list, optional): List of custom characters to use for mapping
+        custom_alphabet (list or Alphabet, optional): List of custom characters to use for mapping
         text_files (list, optional): List of text files to use for word-based mapping
         script_type (str): Type of script to use (default: "kannada")
+        encoding (str): Payload encoding, one of ENCODINGS or a plugin (default: "digits")
+        stream (bool): Encode incrementally with bounded memory (default: False)
+        workers (int, optional): Encode pieces of the source on this many
+            processes; None or 1 encodes in the current process
+        report (dict, optional): Receives the encoding and the digit value
+            -> glyph assignment chosen for the file
+        layout (str): How the payload literal is laid out, one of LAYOUTS
+            (default: DEFAULT_LAYOUT)
+        auto_criterion (str): With script_type="auto", pick the alphabet with
+            the smallest estimated output ("size") or the fewest glyphs to
+            decode ("speed")
+        candidate_files (list, optional): Mapping files that script_type="auto"
+            considers besides CHARACTER_SETS
+        compress (str, optional): Compress the source with one of
+            COMPRESSIONS before encoding it; the whole source is then read
+            at once, so stream and workers are not used
+        whitespace (bool): Replace indentation and runs of spaces with
+            escape characters before encoding (and compressing) the source;
+            like compress, this needs the whole source at once
+        tokens (bool): Replace the most frequent names with escape
+            characters before the other stages (see encode_string)
+        minify (bool or dict): Strip comments, docstrings, trailing
+            whitespace and blank lines before anything else (see
+            encode_string)
+        xor_key (str or bytes, optional): XOR the (compressed) source with
+            a keystream of this key, True for a random key (see
+            encode_string)
+        pipeline (Pipeline or str, optional): Stages to run instead of the
+            ones above, or a spec or pipeline file (see Kannadafy.pipeline)
+
+    Several script types, as a list or comma-separated, obfuscate into one
+    output per script type (see fanout_output_path and obfuscate_fanout).
     """
     # Normalize paths
     input_filepath = os.path.normpath(input_filepath)
@@ -182,36 +1333,52 @@ def obfuscate(input_filepath, output_filepath, kannada=True, mapping_file=None,
     if not os.path.exists(input_filepath):
         raise FileNotFoundError(f"Input file {input_filepath} not found")
 
-    # Determine which alphabet to use
-    alphabet = None
+    script_types = script_type.split(",") if isinstance(script_type, str) else list(script_type)
+    if len(script_types) > 1 and not (text_files or custom_alphabet or mapping_file):
+        outputs = {name: fanout_output_path(output_filepath, name) for name in script_types}
+        try:
+            obfuscate_fanout(input_filepath, outputs, encoding=encoding, layout=layout, workers=workers,
+                             report=report, compress=compress, whitespace=whitespace, tokens=tokens,
+                             minify=minify, xor_key=xor_key, pipeline=pipeline)
+        except Exception as e:
+            raise RuntimeError(f"Obfuscation failed: {str(e)}")
+        return True
+    script_type = script_types[0]
 
-    if text_files:
-        # Use text files for mapping
-        from Kannadafy.utils.text_obfuscation import get_text_file_words
-        alphabet = get_text_file_words(text_files)
-        if not alphabet:
-            raise ValueError("Could not generate sufficient mapping from text files")
-    elif custom_alphabet:
-        # Use provided custom alphabet
-        alphabet = custom_alphabet
-        validate_mapping(alphabet)
-    elif mapping_file:
-        # Load mapping from file
-        alphabet = load_custom_mapping(mapping_file)
-    else:
-        # Use specified script type or default to Kannada
-        if script_type in CHARACTER_SETS:
-            alphabet = CHARACTER_SETS[script_type]
-        else:
-            alphabet = CHARACTER_SETS["kannada"]
+    # Determine which alphabet to use; unknown script types fall back to Kannada
+    if script_type not in CHARACTER_SETS and script_type != "auto":
+        script_type = "kannada"
+    alphabet = _resolve_alphabet(script_type, mapping_file, custom_alphabet, text_files)
+    if alphabet is None:
+        # Pick the candidate with the best estimated output for this file
+        alphabet = _auto_alphabet(input_filepath, encoding, layout, auto_criterion, candidate_files, report,
+                                  compress, whitespace=whitespace, tokens=tokens, minify=minify, xor_key=xor_key,
+                                  pipeline=pipeline)
 
     try:
+        # The stages need the whole source: only the path below applies
+        staged = compress or whitespace or tokens or minify or xor_key or pipeline
+        if staged or layout == "chunked":
+            stream, workers = False, None
+        if workers and workers > 1:
+            encode_file_parallel(input_filepath, output_filepath, alphabet, encoding, workers, report=report,
+                                 layout=layout)
+            return True
+        if not staged and encode_ascii_file(input_filepath, output_filepath, alphabet, encoding, report=report,
+                                            layout=layout):
+            return True
+        if stream:
+            encode_file(input_filepath, output_filepath, alphabet, encoding, report=report, layout=layout)
+            return True
+
         # Read the input file
         with open(input_filepath, 'r', encoding='utf-8') as f:
             input_content = f.read()
 
         # Generate the obfuscated code
-        obfuscated_content = encode_string(input_content, alphabet)
+        obfuscated_content = encode_string(input_content, alphabet, encoding, report=report, layout=layout,
+                                           compress=compress, whitespace=whitespace, tokens=tokens,
+                                           minify=minify, xor_key=xor_key, pipeline=pipeline)
 
         # Write to output file
         with open(output_filepath, 'w', encoding='utf-8') as f:
@@ -221,7 +1388,16 @@ def obfuscate(input_filepath, output_filepath, kannada=True, mapping_file=None,
     except Exception as e:
         raise RuntimeError(f"Obfuscation failed: {str(e)}")
 
-def obfuscate_multiple(input_filepaths, output_dir, alphabet_type="kannada", mapping_file=None, custom_alphabet=None, text_files=None):
+# What obfuscate_multiple returns for each input file: the output path and
+# the script type or mapping file of the alphabet it was obfuscated with
+# (None for a custom alphabet or text files), which is how the choice of
+# alphabet_type="auto" is returned
+ObfuscatedFile = collections.namedtuple("ObfuscatedFile", "output script_type")
+
+def obfuscate_multiple(input_filepaths, output_dir, alphabet_type="kannada", mapping_file=None, custom_alphabet=None, text_files=None, encoding="digits",
+                       stream=False, report=None, layout=DEFAULT_LAYOUT, auto_criterion="size", candidate_files=None,
+                       compress=None, shared_dictionary=False, whitespace=False, tokens=False, minify=False,
+                       xor_key=None, pipeline=None):
     """Obfuscate multiple Python scripts at once.
 
     Args:
@@ -229,11 +1405,37 @@ def obfuscate_multiple(input_filepaths, output_dir, alphabet_type="kannada", map
         output_dir (str): Directory to write the obfuscated outputs
         alphabet_type (str): Type of alphabet to use (default: "kannada")
         mapping_file (str, optional): Path to a custom mapping file
-        custom_alphabet (list, optional): List of custom characters to use for mapping
+        custom_alphabet (list or Alphabet, optional): List of custom characters to use for mapping
         text_files (list, optional): List of text files to use for word-based mapping
+        encoding (str): Payload encoding, one of ENCODINGS or a plugin (default: "digits")
+        stream (bool): Encode incrementally with bounded memory (default: False)
+        report (dict, optional): Receives, for each input file, a dict with
+            the encoding and glyph assignment chosen for it
+        layout (str): How the payload literal is laid out, one of LAYOUTS
+            (default: DEFAULT_LAYOUT)
+        auto_criterion (str): With alphabet_type="auto", see obfuscate()
+        candidate_files (list, optional): With alphabet_type="auto", see obfuscate()
+        compress (str, optional): Compression stage, see obfuscate()
+        shared_dictionary (bool): Compress every file with zlib against one
+            dictionary built from the lines the inputs share (compress must
+            be None, "zlib" or "auto"); the dictionary is written to
+            ZDICT_FILENAME in output_dir and must be shipped with the outputs
+        whitespace (bool): Whitespace stage, see obfuscate()
+        tokens (bool): Token dictionary stage, see obfuscate(); the
+            dictionary is built for each file
+        minify (bool or dict): Minify stage, see obfuscate()
+        xor_key (str or bytes, optional): Keystream XOR stage, see
+            obfuscate(); True makes a random key for each file
+        pipeline (Pipeline or str, optional): Stages to run instead, see
+            obfuscate(); with shared_dictionary, its compress stage uses
+            the dictionary
+
+    With alphabet_type="auto" the alphabet is chosen for each file; the
+    choice is printed and recorded in that file's report.
 
     Returns:
-        dict: Dictionary mapping input files to output files
+        dict: Dictionary mapping input files to the ObfuscatedFile (output
+        file, script type or mapping file) of each
     """
     # Normalize paths
     output_dir = os.path.normpath(output_dir)
@@ -246,27 +1448,26 @@ def obfuscate_multiple(input_filepaths, output_dir, alphabet_type="kannada", map
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
 
-    # Determine which alphabet to use
-    alphabet = None
+    # Determine which alphabet to use; with "auto" it is chosen for each file below
+    alphabet = _resolve_alphabet(alphabet_type, mapping_file, custom_alphabet, text_files)
 
-    if text_files:
-        # Use text files for mapping
-        from Kannadafy.utils.text_obfuscation import get_text_file_words
-        alphabet = get_text_file_words(text_files)
-        if not alphabet:
-            raise ValueError("Could not generate sufficient mapping from text files")
-    elif custom_alphabet:
-        # Use provided custom alphabet
-        alphabet = custom_alphabet
-        validate_mapping(alphabet)
-    elif mapping_file:
-        # Load mapping from file
-        alphabet = load_custom_mapping(mapping_file)
-    elif alphabet_type in CHARACTER_SETS:
-        # Use predefined character set
-        alphabet = CHARACTER_SETS[alphabet_type]
-    else:
-        raise ValueError(f"Unknown alphabet type: {alphabet_type}")
+    zdict = None
+    if shared_dictionary:
+        from Kannadafy.utils.compression import ZDICT_FILENAME, build_zdict
+        if compress not in (None, "zlib", "auto"):
+            raise ValueError("A shared dictionary can only be used with zlib compression")
+        if pipeline is None:
+            compress = compress or "zlib"
+        samples = []
+        for input_file in input_filepaths:
+            if os.path.exists(input_file):
+                with open(input_file, 'rb') as f:
+                    samples.append(f.read())
+        zdict = build_zdict(samples)
+        zdict_path = os.path.join(output_dir, ZDICT_FILENAME)
+        with open(zdict_path, 'wb') as f:
+            f.write(zdict)
+        print(f"[✅] Wrote the shared dictionary ({len(zdict)} bytes) to {zdict_path}")
 
     results = {}
 
@@ -280,21 +1481,127 @@ def obfuscate_multiple(input_filepaths, output_dir, alphabet_type="kannada", map
         base_name, ext = os.path.splitext(filename)
         output_file = os.path.join(output_dir, f"{base_name}_obfuscated{ext}")
 
+        file_report = {} if report is not None else None
         try:
-            # Obfuscate the file
-            with open(input_file, 'r', encoding='utf-8') as f:
-                input_content = f.read()
+            file_alphabet = alphabet
+            if alphabet is None:
+                file_alphabet = _auto_alphabet(input_file, encoding, layout, auto_criterion, candidate_files,
+                                               file_report, compress, zdict, whitespace, tokens, minify, xor_key,
+                                               pipeline)
+            if stream and not (compress or whitespace or tokens or minify or xor_key or pipeline):
+                encode_file(input_file, output_file, file_alphabet, encoding, report=file_report, layout=layout)
+            else:
+                # Obfuscate the file
+                with open(input_file, 'r', encoding='utf-8') as f:
+                    input_content = f.read()
 
-            # Generate the obfuscated code
-            obfuscated_content = encode_string(input_content, alphabet)
+                # Generate the obfuscated code
+                obfuscated_content = encode_string(input_content, file_alphabet, encoding, report=file_report,
+                                                   layout=layout, compress=compress, zdict=zdict,
+                                                   whitespace=whitespace, tokens=tokens, minify=minify,
+                                                   xor_key=xor_key, pipeline=pipeline)
 
-            # Write to output file
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write(obfuscated_content)
+                # Write to output file
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write(obfuscated_content)
 
-            results[input_file] = output_file
-            print(f"[✅] Successfully obfuscated {input_file} to {output_file}")
+            results[input_file] = ObfuscatedFile(output_file, file_alphabet.name)
+            if report is not None:
+                report[input_file] = file_report
+            chosen = f" (script: {file_alphabet.name})" if alphabet is None else ""
+            print(f"[✅] Successfully obfuscated {input_file} to {output_file}{chosen}")
         except Exception as e:
             print(f"[❌] Error obfuscating {input_file}: {str(e)}")
 
     return results
+
+def obfuscate_sources(sources, alphabet="kannada", encoding="digits", mapping_file=None, text_files=None,
+                      backend="auto", reports=None, layout=DEFAULT_LAYOUT, auto_criterion="size",
+                      candidate_files=None, compress=None, whitespace=False, tokens=False, minify=False,
+                      xor_key=None, pipeline=None):
+    """Obfuscate several Python sources in memory, without reading or writing files.
+
+    The alphabet is resolved once, and the encoder (its glyph assignment,
+    encode table and stub header) is built once from the character counts
+    of all the sources and shared by them; sources whose stages leave
+    bytes (compress, xor_key) share a second one. The outputs can
+    therefore differ from those of obfuscate_source for the same text, but
+    they run the same.
+
+    Args:
+        sources (dict): Name -> source code of each module
+        alphabet (str, list or Alphabet): Script type, one of
+            CHARACTER_SETS or "auto", or the glyphs to use (default:
+            "kannada")
+        encoding (str): Payload encoding, one of ENCODINGS or a plugin (default: "digits")
+        mapping_file (str, optional): Path to a custom mapping file, used
+            instead of alphabet
+        text_files (list, optional): Text files whose words are used
+            instead of alphabet
+        backend (str): Payload kernel, see encode_string
+        reports (dict, optional): Receives a report (see encode_string) for
+            each name
+        layout (str): How the payload literals are laid out, one of LAYOUTS
+            (default: DEFAULT_LAYOUT)
+        auto_criterion (str): With alphabet="auto", see obfuscate(); the
+            alphabet is chosen once for all the sources
+        candidate_files (list, optional): With alphabet="auto", see obfuscate()
+        compress (str, optional): Compression stage, see encode_string
+        whitespace (bool): Whitespace stage, see encode_string
+        tokens (bool): Token dictionary stage, see encode_string
+        minify (bool or dict): Minify stage, see encode_string
+        xor_key (str or bytes, optional): Keystream XOR stage, see
+            encode_string; True makes a random key for each source
+        pipeline (Pipeline or str, optional): Stages to run instead, see
+            encode_string
+
+    Returns:
+        dict: Name -> obfuscated source
+    """
+    if isinstance(alphabet, str):
+        glyphs = _resolve_alphabet(alphabet, mapping_file, None, text_files)
+    else:
+        glyphs = _resolve_alphabet(None, mapping_file, alphabet, text_files)
+    stages = _stage_pipeline(compress, whitespace, tokens, minify, xor_key, pipeline)
+
+    prepared, texts = {}, {}
+    for name, source in sources.items():
+        report = None if reports is None else reports.setdefault(name, {})
+        prepared[name] = stages.prepare(source, report)
+        texts.setdefault(prepared[name][1], []).append(prepared[name][0])
+    if glyphs is None:
+        everything = [text for group in texts.values() for text in group]
+        auto = {}
+        glyphs = _best_alphabet(_char_counts(everything), sum(map(len, everything)), encoding, layout,
+                                auto_criterion, candidate_files, auto)
+        for report in (reports or {}).values():
+            report.update(auto)
+
+    # One encoder, and one stub around the payload, for each codec
+    stubs = {}
+    for codec, group in texts.items():
+        encoder = _get_encoder(glyphs, encoding, _payload_counts(group, encoding, layout), backend, codec)
+        stubs[codec] = encoder, _layout_stub(encoder, layout)
+
+    results = {}
+    for name, (text, codec, wraps) in prepared.items():
+        encoder, stub = stubs[codec]
+        if reports is not None:
+            _fill_report(reports[name], encoding, encoder)
+        header, footer = _wrap_stub(*stub, wraps)
+        results[name] = header + _encode_payload(encoder, text, layout) + footer
+    return results
+
+def obfuscate_source(source, alphabet="kannada", encoding="digits", mapping_file=None, text_files=None,
+                     backend="auto", report=None, layout=DEFAULT_LAYOUT, auto_criterion="size",
+                     candidate_files=None, compress=None, whitespace=False, tokens=False, minify=False,
+                     xor_key=None, pipeline=None):
+    """Obfuscate a Python source in memory and return the obfuscated source.
+
+    The arguments are those of obfuscate_sources, with one source and one
+    report; unlike obfuscate(), an unknown alphabet raises ValueError.
+    """
+    reports = None if report is None else {0: report}
+    return obfuscate_sources({0: source}, alphabet, encoding, mapping_file, text_files, backend, reports, layout,
+                             auto_criterion, candidate_files, compress, whitespace, tokens, minify, xor_key,
+                             pipeline)[0]
@@ -6,7 +6,7 @@ from importlib.metadata import version, PackageNotFoundError
 from .core import (
     obfuscate, generate_mapping_template,
     get_available_scripts, CHARACTER_SETS,
-    obfuscate_multiple
+    obfuscate_multiple, DEFAULT_LAYOUT
 )
 
 try:
@@ -33,7 +33,10 @@ def print_banner():
     print(BANNER)
 
 def obfuscate_api(input_filepath, output_filepath, script_type="kannada",
-                 mapping_file=None, custom_alphabet=None, text_files=None):
+                 mapping_file=None, custom_alphabet=None, text_files=None,
+                 encoding="digits", stream=False, workers=None, report=None,
+                 layout=DEFAULT_LAYOUT, auto_criterion="size", candidate_files=None,
+                 compress=None, whitespace=False, tokens=False, minify=False, xor_key=None, pipeline=None):
     """API function to obfuscate a Python file."""
     return obfuscate(
         input_filepath=input_filepath,
@@ -41,11 +44,28 @@ def obfuscate_api(input_filepath, output_filepath, script_type="kannada",
         script_type=script_type,
         mapping_file=mapping_file,
         custom_alphabet=custom_alphabet,
-        text_files=text_files
+        text_files=text_files,
+        encoding=encoding,
+        stream=stream,
+        workers=workers,
+        report=report,
+        layout=layout,
+        auto_criterion=auto_criterion,
+        candidate_files=candidate_files,
+        compress=compress,
+        whitespace=whitespace,
+        tokens=tokens,
+        minify=minify,
+        xor_key=xor_key,
+        pipeline=pipeline
     )
 
 def obfuscate_multiple_api(input_filepaths, output_dir, script_type="kannada",
-                           mapping_file=None, custom_alphabet=None, text_files=None):
+                           mapping_file=None, custom_alphabet=None, text_files=None,
+                           encoding="digits", stream=False, report=None,
+                           layout=DEFAULT_LAYOUT, auto_criterion="size", candidate_files=None,
+                           compress=None, shared_dictionary=False, whitespace=False, tokens=False,
+                           minify=False, xor_key=None, pipeline=None):
     """API function to obfuscate multiple Python files."""
     return obfuscate_multiple(
         input_filepaths=input_filepaths,
@@ -53,7 +73,20 @@ def obfuscate_multiple_api(input_filepaths, output_dir, script_type="kannada",
         alphabet_type=script_type,
         mapping_file=mapping_file,
         custom_alphabet=custom_alphabet,
-        text_files=text_files
+        text_files=text_files,
+        encoding=encoding,
+        stream=stream,
+        report=report,
+        layout=layout,
+        auto_criterion=auto_criterion,
+        candidate_files=candidate_files,
+        compress=compress,
+        shared_dictionary=shared_dictionary,
+        whitespace=whitespace,
+        tokens=tokens,
+        minify=minify,
+        xor_key=xor_key,
+        pipeline=pipeline
     )
 
 def main():
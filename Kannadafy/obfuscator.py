@@ -0,0 +1,150 @@
+"""
+Reusable Obfuscator for Kannadafy
+
+obfuscate() and encode_string() resolve the alphabet and build the
+encoder (glyph assignment, encode table and stub header) on every call,
+fitted to the characters of that one source. An Obfuscator does this
+once: the alphabet is resolved when it is created, and the encoder is
+built for a fixed set of characters (ASCII, plus those of an optional
+sample) the first time a source needs it, then reused. A source that
+holds other characters gets an encoder of its own, as with
+encode_string.
+
+    obfuscator = Obfuscator("telugu", encoding="radix")
+    for path, source in generated_modules():
+        write(path, obfuscator.obfuscate_source(source))
+
+An Obfuscator is not changed by obfuscating, so one instance can be used
+from several threads at once.
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, Optional, Union
+
+from Kannadafy.alphabet import Alphabet
+from Kannadafy.core import (
+    CHUNKED_ENCODINGS, DEFAULT_LAYOUT, _best_alphabet, _char_counts, _encode_payload, _fill_report, _get_encoder,
+    _layout_stub, _payload_counts, _resolve_alphabet, _stage_pipeline, _wrap_stub
+)
+
+# Characters the encoder of each codec is built for, besides those of the
+# sample: any ASCII text for "utf-8", any bytes for "latin-1"
+CODEC_CHARACTERS = {"utf-8": 128, "latin-1": 256}
+
+class Obfuscator:
+    """Obfuscate many sources with one alphabet, encoding, layout and set of stages."""
+
+    def __init__(self, alphabet: Union[str, Iterable[str], Alphabet] = "kannada", encoding: str = "digits",
+                 mapping_file: Optional[str] = None, text_files: Optional[list] = None, backend: str = "auto",
+                 layout: str = DEFAULT_LAYOUT, sample: Union[str, Iterable[str], None] = None,
+                 auto_criterion: str = "size", candidate_files: Optional[list] = None, compress=None,
+                 whitespace=False, tokens=False, minify=False, xor_key=None, pipeline=None):
+        """Resolve the alphabet and set up the stages.
+
+        Args:
+            alphabet: Script type, one of CHARACTER_SETS or "auto", or the
+                glyphs to use, as a list or an Alphabet (default: "kannada")
+            encoding: Payload encoding, one of ENCODINGS or a plugin (default: "digits")
+            mapping_file: Path to a custom mapping file, used instead of alphabet
+            text_files: Text files whose words are used instead of alphabet
+            backend: Payload kernel, see encode_string
+            layout: How the payload literals are laid out, one of LAYOUTS
+            sample: Source (or sources) typical of what will be obfuscated;
+                the glyph assignment is chosen for its characters, and
+                "auto" picks the alphabet for it
+            auto_criterion: With alphabet="auto", see obfuscate()
+            candidate_files: With alphabet="auto", see obfuscate()
+            compress, whitespace, tokens, minify, xor_key, pipeline: Stages,
+                see encode_string; xor_key=True makes a random key for
+                each source
+        """
+        if isinstance(alphabet, str):
+            glyphs = _resolve_alphabet(alphabet, mapping_file, None, text_files)
+        else:
+            glyphs = _resolve_alphabet(None, mapping_file, alphabet, text_files)
+        if layout == "chunked" and encoding not in CHUNKED_ENCODINGS:
+            raise ValueError(f"The chunked layout needs one of the encodings: {', '.join(CHUNKED_ENCODINGS)}")
+        self.sample_counts = _char_counts([sample] if isinstance(sample, str) else list(sample or []))
+        # What choosing the alphabet recorded, copied into every report
+        self._alphabet_report = {}
+        if glyphs is None:
+            counts = self._counts("utf-8")
+            glyphs = _best_alphabet(counts, sum(counts.values()), encoding, layout, auto_criterion,
+                                    candidate_files, self._alphabet_report)
+        self.alphabet = glyphs
+        self.encoding = encoding
+        self.backend = backend
+        self.layout = layout
+        self.pipeline = _stage_pipeline(compress, whitespace, tokens, minify, xor_key, pipeline)
+        # codec -> (encoder, (header, footer), characters it can encode or
+        # None for any)
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def _counts(self, codec):
+        """Character counts the encoder of codec is built from."""
+        counts = _char_counts([])
+        counts.update(map(chr, range(CODEC_CHARACTERS.get(codec, 128))))
+        if codec == "utf-8":
+            counts.update(self.sample_counts)
+        return counts
+
+    def _compile(self, codec):
+        """Return the encoder, stub and characters of codec, building them the first time."""
+        compiled = self._compiled.get(codec)
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled.get(codec)
+                if compiled is None:
+                    # The chunked layout builds tables for any character
+                    counts = None if self.layout == "chunked" else self._counts(codec)
+                    encoder = _get_encoder(self.alphabet, self.encoding, counts, self.backend, codec)
+                    compiled = self._compiled[codec] = (encoder, _layout_stub(encoder, self.layout),
+                                                        None if counts is None else frozenset(counts))
+        return compiled
+
+    def obfuscate_source(self, source: str, report: Optional[dict] = None) -> str:
+        """Obfuscate a Python source and return the obfuscated source.
+
+        report receives what encode_string records, except the stage
+        timings of the encoding and the stub.
+        """
+        text, codec, wraps = self.pipeline.prepare(source, report)
+        encoder, stub, characters = self._compile(codec)
+        covered = characters is None or (codec == "utf-8" and text.isascii()) or characters.issuperset(text)
+        if not covered:
+            # Characters the shared encoder was not built for
+            encoder = _get_encoder(self.alphabet, self.encoding, _payload_counts(text, self.encoding, self.layout),
+                                   self.backend, codec)
+            stub = _layout_stub(encoder, self.layout)
+        if report is not None:
+            report.update(self._alphabet_report)
+            _fill_report(report, self.encoding, encoder)
+        header, footer = _wrap_stub(*stub, wraps) if wraps else stub
+        return header + _encode_payload(encoder, text, self.layout) + footer
+
+    def obfuscate_sources(self, sources: Dict[str, str], reports: Optional[dict] = None) -> Dict[str, str]:
+        """Obfuscate several sources; returns name -> obfuscated source.
+
+        reports, if given, receives a report for each name.
+        """
+        return {
+            name: self.obfuscate_source(source, None if reports is None else reports.setdefault(name, {}))
+            for name, source in sources.items()
+        }
+
+    def obfuscate_file(self, input_filepath: str, output_filepath: str, report: Optional[dict] = None) -> bool:
+        """Obfuscate a Python script into output_filepath."""
+        input_filepath = os.path.normpath(input_filepath)
+        if not os.path.exists(input_filepath):
+            raise FileNotFoundError(f"Input file {input_filepath} not found")
+        with open(input_filepath, 'r', encoding='utf-8') as f:
+            obfuscated_content = self.obfuscate_source(f.read(), report)
+        with open(os.path.normpath(output_filepath), 'w', encoding='utf-8') as f:
+            f.write(obfuscated_content)
+        return True
+
+    def __repr__(self):
+        return (f"Obfuscator(encoding={self.encoding!r}, layout={self.layout!r}, "
+                f"pipeline={self.pipeline.spec()!r}, glyphs={len(self.alphabet)})")
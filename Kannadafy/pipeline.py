@@ -0,0 +1,372 @@
+"""
+Obfuscation Pipelines for Kannadafy
+
+A pipeline is the chain of stages a source goes through before it is
+glyph-encoded (minify, token dictionary, whitespace, compression, keystream
+XOR), followed by the encoding itself and the stub that wraps it. The
+stages are connected by iterators of text pieces: a stage that can work
+piece by piece (compression with a fixed method) passes its output on as
+it goes, the others read their whole input first. Every stage also gives
+the expression that undoes it, and the stub applies those in reverse
+order.
+
+A pipeline does not bound memory: the source is a string, every stage but
+a fixed-method compress joins its input, and the output of the last stage
+is joined too, as the encoder is fitted to the character counts of the
+whole text. This is why obfuscate() does not stream when there are stages.
+
+Pipelines are built from the keyword arguments of encode_string, from a
+spec such as "minify,tokens,compress=lzma" or from a YAML or JSON file:
+
+    stages:
+      - minify: {keep_docstrings: true}
+      - tokens
+      - compress: auto
+
+With a report, every stage records its time and the bytes it read and
+wrote under "stages".
+"""
+
+import os
+import abc
+import copy
+import json
+import time
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import yaml
+
+from Kannadafy.core import (
+    COMPRESSIONS, DEFAULT_LAYOUT, _compress_source, _encode_payload, _fill_report, _get_encoder, _layout_stub,
+    _minify_source, _payload_counts, _tokens_source, _whitespace_source, _wrap_stub, _xor_source
+)
+
+# Options of the minify stage that a spec can switch on, as minify=a+b
+MINIFY_OPTIONS = ("keep_docstrings", "indent")
+
+def _text_codec(text, codec):
+    """codec, or UTF-8 when escapes added to latin-1 text took it past latin-1."""
+    return "utf-8" if codec == "latin-1" and not text.isascii() and max(text) > "\xff" else codec
+
+class Stage(abc.ABC):
+    """One step of a pipeline.
+
+    run() takes the pieces of the text and a callable giving the codec
+    that turns them into bytes ("utf-8" for source, "latin-1" for bytes),
+    which is known once the first piece has been read, and yields the
+    pieces of its output. Once they are all read, codec is the codec of the
+    output and decode the (text before, text after) pair the stub puts
+    around its decode expression, or None when nothing has to be undone.
+    Subclasses must define run(), or they cannot be instantiated.
+    """
+
+    name = ""
+
+    def __init__(self):
+        self.codec = "utf-8"
+        self.decode = None
+
+    @abc.abstractmethod
+    def run(self, pieces: Iterable[str], codec: Callable[[], str], report: Optional[dict] = None,
+            zdict: Optional[bytes] = None) -> Iterator[str]:
+        """Yield the pieces of the output of the stage."""
+
+    def spec(self) -> str:
+        """The stage as it is written in a spec."""
+        return self.name
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.spec()!r})"
+
+class MinifyStage(Stage):
+    """Strip comments, docstrings and blank lines (see Kannadafy.utils.minify)."""
+
+    name = "minify"
+
+    def __init__(self, keep_docstrings=False, indent=False):
+        super().__init__()
+        self.options = {"keep_docstrings": keep_docstrings, "indent": indent}
+
+    def run(self, pieces, codec, report=None, zdict=None):
+        text = "".join(pieces)
+        self.codec = codec()
+        yield _minify_source(text, self.options, report)
+
+    def spec(self):
+        chosen = [option for option in MINIFY_OPTIONS if self.options[option]]
+        return self.name + ("=" + "+".join(chosen) if chosen else "")
+
+class TokensStage(Stage):
+    """Replace the most frequent names with escapes (see Kannadafy.utils.tokens)."""
+
+    name = "tokens"
+
+    def run(self, pieces, codec, report=None, zdict=None):
+        text, self.decode = _tokens_source("".join(pieces), report)
+        self.codec = _text_codec(text, codec())
+        yield text
+
+class WhitespaceStage(Stage):
+    """Replace indentation and runs of spaces with escapes (see Kannadafy.utils.whitespace)."""
+
+    name = "whitespace"
+
+    def run(self, pieces, codec, report=None, zdict=None):
+        text, self.decode = _whitespace_source("".join(pieces), report)
+        self.codec = _text_codec(text, codec())
+        yield text
+
+class CompressStage(Stage):
+    """Compress the bytes of the text with one of COMPRESSIONS.
+
+    A fixed method compresses piece by piece; "auto" has to try every
+    compressor on the whole input.
+    """
+
+    name = "compress"
+
+    def __init__(self, method="auto"):
+        super().__init__()
+        if method not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {method}. Available compressions: {', '.join(COMPRESSIONS)}")
+        self.method = method
+
+    def run(self, pieces, codec, report=None, zdict=None):
+        if self.method == "auto":
+            text = "".join(pieces)
+            text, self.codec, self.decode = _compress_source(text, self.method, report, zdict, codec())
+            yield text
+            return
+        from Kannadafy.utils.compression import compressor, decompress_expr
+
+        stream = compressor(self.method, zdict)
+        self.codec = "latin-1"
+        size = compressed = 0
+        for piece in pieces:
+            data = piece.encode(codec())
+            size += len(data)
+            out = stream.compress(data)
+            if out:
+                compressed += len(out)
+                yield out.decode("latin-1")
+        out = stream.flush()
+        compressed += len(out)
+        shared = bool(zdict) and self.method == "zlib"
+        if report is not None:
+            report["compression"] = {"method": self.method, "size": size, "compressed": compressed,
+                                     "shared_dictionary": shared}
+        self.decode = decompress_expr(self.method, shared, codec())
+        yield out.decode("latin-1")
+
+    def spec(self):
+        return f"{self.name}={self.method}"
+
+class XorStage(Stage):
+    """XOR the bytes of the text with a shake_256 keystream (see Kannadafy.utils.keystream).
+
+    The keystream is made in one call for the whole input, so the input is
+    read first.
+    """
+
+    name = "xor"
+
+    def __init__(self, key=True):
+        super().__init__()
+        self.key = key
+
+    def run(self, pieces, codec, report=None, zdict=None):
+        text = "".join(pieces)
+        text, self.codec, self.decode = _xor_source(text, codec(), self.key, report)
+        yield text
+
+    def spec(self):
+        return self.name if self.key is True else f"{self.name}={self.key}"
+
+# Stage classes by the name used in specs and config files
+STAGES = {stage.name: stage for stage in (MinifyStage, TokensStage, WhitespaceStage, CompressStage, XorStage)}
+
+def make_stage(name: str, value=True) -> Stage:
+    """Build a stage from its name and the value given for it in a spec or config file.
+
+    True (or None) takes the defaults, a dict is passed as keyword
+    arguments; otherwise the value is the method of compress, the key of
+    xor or the "+"-separated options of minify.
+    """
+    if name not in STAGES:
+        raise ValueError(f"Unknown pipeline stage: {name}. Available stages: {', '.join(STAGES)}")
+    stage = STAGES[name]
+    if value is True or value is None:
+        return stage()
+    if isinstance(value, dict):
+        return stage(**value)
+    if name in ("compress", "xor"):
+        return stage(str(value))
+    if name == "minify":
+        options = [option for option in str(value).split("+") if option]
+        unknown = set(options).difference(MINIFY_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown minify options: {', '.join(sorted(unknown))}. "
+                             f"Available options: {', '.join(MINIFY_OPTIONS)}")
+        return stage(**{option: True for option in options})
+    raise ValueError(f"The {name} stage takes no options")
+
+def _metered(pieces, stats, key, codec):
+    """Pass pieces on, adding their size to stats[key] and the time spent making them to stats[key + "_seconds"]."""
+    pieces = iter(pieces)
+    while True:
+        start = time.perf_counter()
+        try:
+            piece = next(pieces)
+        except StopIteration:
+            stats[key + "_seconds"] += time.perf_counter() - start
+            return
+        stats[key + "_seconds"] += time.perf_counter() - start
+        stats[key] += len(piece) if codec() == "latin-1" else len(piece.encode("utf-8"))
+        yield piece
+
+class Pipeline:
+    """The stages a source goes through before it is encoded, in order.
+
+    The whole source, and the whole output of the last stage, are held in
+    memory (see the module docstring).
+    """
+
+    def __init__(self, stages: Iterable[Stage] = ()):
+        self.stages = list(stages)
+
+    @classmethod
+    def from_options(cls, compress=None, whitespace=False, tokens=False, minify=False, xor_key=None):
+        """Build the pipeline of the stage arguments of encode_string.
+
+        The stages run in the order minify, tokens, whitespace, compress,
+        xor.
+        """
+        stages = []
+        if minify:
+            stages.append(MinifyStage(**(minify if isinstance(minify, dict) else {})))
+        if tokens:
+            stages.append(TokensStage())
+        if whitespace:
+            stages.append(WhitespaceStage())
+        if compress:
+            stages.append(CompressStage(compress))
+        if xor_key:
+            stages.append(XorStage(xor_key))
+        return cls(stages)
+
+    @classmethod
+    def from_spec(cls, spec: str):
+        """Build a pipeline from a comma-separated spec, e.g. "minify=indent,tokens,compress=lzma,xor"."""
+        stages = []
+        for item in spec.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            name, sep, value = item.partition("=")
+            stages.append(make_stage(name.strip(), value.strip() if sep else True))
+        return cls(stages)
+
+    @classmethod
+    def from_file(cls, path: str):
+        """Build a pipeline from a YAML or JSON file with a "stages" list.
+
+        Each entry is a stage name, or a one-key mapping from the name to
+        its value (see make_stage).
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Pipeline file '{path}' not found")
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f) if os.path.splitext(path)[1].lower() == '.json' else yaml.safe_load(f)
+        if not isinstance(data, dict) or not isinstance(data.get("stages"), list):
+            raise ValueError("Pipeline file must contain a 'stages' key with a list of stages")
+        stages = []
+        for entry in data["stages"]:
+            if isinstance(entry, str):
+                stages.append(make_stage(entry))
+            elif isinstance(entry, dict) and len(entry) == 1:
+                stages.append(make_stage(*next(iter(entry.items()))))
+            else:
+                raise ValueError(f"Invalid pipeline stage: {entry!r}")
+        return cls(stages)
+
+    @classmethod
+    def load(cls, value: str):
+        """Build a pipeline from a file if value is the path of one, else from a spec."""
+        return cls.from_file(value) if os.path.isfile(value) else cls.from_spec(value)
+
+    def spec(self) -> str:
+        """The pipeline as a spec for from_spec."""
+        return ",".join(stage.spec() for stage in self.stages)
+
+    def __bool__(self):
+        return bool(self.stages)
+
+    def __repr__(self):
+        return f"Pipeline({self.spec()!r})"
+
+    def prepare(self, source: str, report: Optional[dict] = None, zdict: Optional[bytes] = None):
+        """Run the stages on a source.
+
+        The pieces the last stage yields are joined into one text.
+
+        Args:
+            source: Source to transform
+            report: Receives what each stage records, and under "stages" a
+                list of {"name", "seconds", "bytes_in", "bytes_out"}
+            zdict: Shared zlib dictionary for the compress stage
+
+        Returns:
+            tuple: (text to encode, codec of that text, list of the (text
+            before, text after) pairs the stub puts around its decode
+            expression, in the order the stages were applied)
+        """
+        # Stages keep what they found on themselves, so each run gets copies
+        stages = [copy.copy(stage) for stage in self.stages]
+        pieces, codec = iter([source]), (lambda: "utf-8")
+        metered = []
+        for stage in stages:
+            if report is not None:
+                stats = {"name": stage.name, "bytes_in": 0, "bytes_in_seconds": 0.0, "bytes_out": 0,
+                         "bytes_out_seconds": 0.0}
+                metered.append(stats)
+                pieces = _metered(pieces, stats, "bytes_in", codec)
+            pieces = stage.run(pieces, codec, report, zdict)
+            codec = (lambda stage=stage: stage.codec)
+            if report is not None:
+                pieces = _metered(pieces, stats, "bytes_out", codec)
+        text = "".join(pieces)
+        if report is not None:
+            # Pulling a stage's output also runs the stages before it
+            report["stages"] = [
+                {"name": stats["name"], "seconds": max(0.0, stats["bytes_out_seconds"] - stats["bytes_in_seconds"]),
+                 "bytes_in": stats["bytes_in"], "bytes_out": stats["bytes_out"]}
+                for stats in metered
+            ]
+        return text, codec(), [stage.decode for stage in stages if stage.decode is not None]
+
+    def encode(self, source: str, alphabet: List[str], encoding: str = "digits", backend: str = "auto",
+               layout: str = DEFAULT_LAYOUT, report: Optional[dict] = None, zdict: Optional[bytes] = None) -> str:
+        """Run the stages, encode the result and wrap it in the decoder stub.
+
+        The arguments are those of encode_string. The payload and the
+        output are built in memory, like the text. With a report, the
+        "encode" (the payload) and "wrap" (the stub around it) steps are
+        timed after the stages.
+        """
+        text, codec, wraps = self.prepare(source, report, zdict)
+        start = time.perf_counter()
+        encoder = _get_encoder(alphabet, encoding, _payload_counts(text, encoding, layout), backend, codec)
+        _fill_report(report, encoding, encoder)
+        payload = _encode_payload(encoder, text, layout)
+        encoded = time.perf_counter()
+        header, footer = _wrap_stub(*_layout_stub(encoder, layout), wraps)
+        output = header + payload + footer
+        if report is not None:
+            size = len(text) if codec == "latin-1" else len(text.encode("utf-8"))
+            payload_size = len(payload.encode("utf-8"))
+            report.setdefault("stages", []).extend([
+                {"name": "encode", "seconds": encoded - start, "bytes_in": size, "bytes_out": payload_size},
+                {"name": "wrap", "seconds": time.perf_counter() - encoded, "bytes_in": payload_size,
+                 "bytes_out": payload_size + len((header + footer).encode("utf-8"))},
+            ])
+        return output
@@ -5,7 +5,7 @@ This package contains utility modules for Kannadafy operations.
 
 from .mapping import MappingLoader, MappingGenerator
 from .text_obfuscation import get_text_file_words, validate_word_mapping
-from .validation import validate_mapping, validate_input_file, validate_wordlist_files
+from .validation import validate_mapping, validate_prefix_free, validate_input_file, validate_wordlist_files
 
 __all__ = [
     'MappingLoader',
@@ -13,6 +13,7 @@ __all__ = [
     'get_text_file_words',
     'validate_word_mapping',
     'validate_mapping',
+    'validate_prefix_free',
     'validate_input_file',
     'validate_wordlist_files'
 ]
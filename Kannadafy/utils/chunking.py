@@ -0,0 +1,74 @@
+"""
+Content-Defined Chunking Utilities for Kannadafy
+
+This module cuts a source into chunks at boundaries chosen by its content
+rather than by position, so that an edit only moves the boundaries next
+to it: the chunks before and after it come out the same and, encoded on
+their own, give the same output lines. It also measures how much of a
+text changed between two versions, to report what an edit costs.
+"""
+
+import difflib
+import zlib
+from typing import Dict, List
+
+# A line ends a chunk when the low CHUNK_MASK_BITS bits of the rolling hash
+# are zero, so chunks hold about 2 ** CHUNK_MASK_BITS lines on average
+CHUNK_MASK_BITS = 4
+# Characters a chunk holds at least (unless it ends the source) and at most
+# (unless a single line is longer)
+CHUNK_MIN_SIZE = 512
+CHUNK_MAX_SIZE = 8192
+
+def content_chunks(text: str, mask_bits: int = CHUNK_MASK_BITS, min_size: int = CHUNK_MIN_SIZE,
+                   max_size: int = CHUNK_MAX_SIZE) -> List[str]:
+    """Cut text into chunks that end at content-defined line boundaries.
+
+    The rolling hash adds the CRC-32 of each line to itself shifted left by
+    one, so its low mask_bits bits only depend on the last mask_bits lines
+    and a boundary found before an edit is found again after it.
+
+    Args:
+        text: Source to cut
+        mask_bits: Bits of the hash that must be zero at a boundary
+        min_size: Characters a chunk holds before a boundary is looked for
+        max_size: Characters after which a chunk ends at the next line end
+
+    Returns:
+        The chunks, which join back to text; empty for an empty text
+    """
+    mask = (1 << mask_bits) - 1
+    chunks, lines, size, h = [], [], 0, 0
+    for line in text.splitlines(keepends=True):
+        h = ((h << 1) + zlib.crc32(line.encode("utf-8"))) & 0xFFFFFFFF
+        lines.append(line)
+        size += len(line)
+        if size >= max_size or (size >= min_size and not h & mask):
+            chunks.append("".join(lines))
+            lines, size = [], 0
+    if lines:
+        chunks.append("".join(lines))
+    return chunks
+
+def diff_stats(old: str, new: str) -> Dict[str, int]:
+    """Measure how much of new differs from old, line by line.
+
+    Returns:
+        dict: "lines" and "size" (UTF-8 bytes) of new, "changed_lines" and
+        "changed_size" of the lines of new that are not in old, and
+        "removed_lines", the lines of old that are not in new
+    """
+    old_lines, new_lines = old.splitlines(keepends=True), new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    changed, removed = [], 0
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            changed.extend(new_lines[j1:j2])
+            removed += i2 - i1
+    return {
+        "lines": len(new_lines),
+        "size": len(new.encode("utf-8")),
+        "changed_lines": len(changed),
+        "changed_size": sum(len(line.encode("utf-8")) for line in changed),
+        "removed_lines": removed,
+    }
@@ -0,0 +1,115 @@
+"""
+Compression Utilities for Kannadafy
+
+This module compresses the UTF-8 bytes of a source before they are
+glyph-encoded, and builds the expression the decoder stub uses to
+decompress them again. Compressed bytes travel through the encoders as a
+string of code points below 256 (the bytes read as latin-1).
+
+A batch of sources can share a zlib preset dictionary built from the lines
+they have in common; it is written once next to the outputs and every stub
+reads it from there.
+"""
+
+import bz2
+import collections
+import lzma
+import zlib
+from typing import Optional, Sequence, Tuple
+
+COMPRESSORS = ("zlib", "bz2", "lzma")
+
+# With "auto", a compressor that decompresses slower than the one before it
+# in COMPRESSORS must make the data at least this much smaller to be chosen
+AUTO_MIN_GAIN = 0.02
+
+# File name of a shared dictionary, next to the outputs that use it
+ZDICT_FILENAME = "kannadafy.zdict"
+# zlib only looks back this far, so a longer dictionary would not help
+ZDICT_SIZE = 1 << 15
+
+def build_zdict(samples: Sequence[bytes], size: int = ZDICT_SIZE) -> bytes:
+    """Build a zlib preset dictionary from the lines shared by samples.
+
+    Lines found in at least two samples (imports, boilerplate, docstring
+    sections) are scored by the bytes they would save, (samples - 1) *
+    length, and the best ones that fit in size are kept. zlib encodes
+    nearby matches with fewer bits, so the best lines go last.
+
+    Args:
+        samples: The sources of the batch, as bytes
+        size: Largest dictionary to build, in bytes
+
+    Returns:
+        The dictionary; empty when the samples have no line in common
+    """
+    found = collections.Counter()
+    for sample in samples:
+        found.update(set(sample.splitlines(keepends=True)))
+    lines = sorted((line for line, n in found.items() if n > 1 and line.strip()),
+                   key=lambda line: ((found[line] - 1) * len(line), line), reverse=True)
+    chosen, total = [], 0
+    for line in lines:
+        if total + len(line) <= size:
+            chosen.append(line)
+            total += len(line)
+    return b"".join(reversed(chosen))
+
+def compressor(method: str, zdict: Optional[bytes] = None):
+    """Return an incremental compressor (with compress and flush) for method.
+
+    It writes the same stream as compress_bytes: lzma the legacy .lzma
+    container, whose header is a few dozen bytes shorter than that of .xz
+    and which lzma.decompress detects, and zlib with zdict a raw deflate
+    stream primed with that dictionary.
+    """
+    if method == "zlib" and zdict:
+        return zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=zdict)
+    if method == "zlib":
+        return zlib.compressobj(9)
+    if method == "bz2":
+        return bz2.BZ2Compressor(9)
+    if method == "lzma":
+        return lzma.LZMACompressor(format=lzma.FORMAT_ALONE, preset=9)
+    raise ValueError(f"Unknown compression: {method}. Available compressions: {', '.join(COMPRESSORS)}")
+
+def compress_bytes(data: bytes, method: str, zdict: Optional[bytes] = None) -> bytes:
+    """Compress data at the highest level of method (see compressor)."""
+    stream = compressor(method, zdict)
+    return stream.compress(data) + stream.flush()
+
+def choose_compressor(data: bytes, zdict: Optional[bytes] = None) -> Tuple[Optional[str], bytes]:
+    """Compress data with every compressor and keep the best trade-off.
+
+    COMPRESSORS is ordered from the fastest to decompress to the slowest;
+    a slower one is only kept when it saves AUTO_MIN_GAIN of the size.
+    Data that no compressor makes smaller (very short sources) is kept.
+    zdict is passed on to compress_bytes.
+
+    Returns:
+        (name of the compressor or None, compressed data or data itself)
+    """
+    best = (None, data)
+    for method in COMPRESSORS:
+        compressed = compress_bytes(data, method, zdict)
+        if len(compressed) < len(best[1]) * (1 - AUTO_MIN_GAIN):
+            best = (method, compressed)
+    return best
+
+def decompress_expr(method: str, zdict: bool = False, codec: str = "utf-8") -> Tuple[str, str]:
+    """Return the code to put around a latin-1 string expression to decompress it.
+
+    With zdict, the zlib stream was compressed against the shared
+    dictionary, which the stub reads from ZDICT_FILENAME next to itself.
+
+    Returns:
+        (text before, text after) the expression; together they evaluate
+        to the decompressed data decoded with codec, as a str
+    """
+    if method not in COMPRESSORS:
+        raise ValueError(f"Unknown compression: {method}. Available compressions: {', '.join(COMPRESSORS)}")
+    if method == "zlib" and zdict:
+        zdict_expr = f'__import__("pathlib").Path(__file__).with_name("{ZDICT_FILENAME}").read_bytes()'
+        return (f'__import__("zlib").decompressobj(-{zlib.MAX_WBITS},{zdict_expr}).decompress(',
+                f'.encode("latin-1")).decode("{codec}")')
+    return f'__import__("{method}").decompress(', f'.encode("latin-1")).decode("{codec}")'
@@ -0,0 +1,155 @@
+"""
+Glyph Cost Optimization for Kannadafy
+
+Glyphs differ a lot in UTF-8 size: Greek letters take 2 bytes, Kannada
+letters 3, "ಅಂ" 6 and emoji sequences with joiners 11 or more. These
+functions choose which glyphs an encoding uses and which digit value each
+one stands for, so that the most frequent digits of a payload get the
+cheapest glyphs.
+"""
+
+import math
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .radix import digit_width
+
+def glyph_cost(glyph: str) -> int:
+    """Return the size of a glyph in the UTF-8 output, in bytes."""
+    return len(glyph.encode("utf-8"))
+
+def payload_cost(histogram: Sequence[int], glyphs: Sequence[str]) -> int:
+    """Return the bytes taken by digits with these counts written with glyphs."""
+    return sum(count * glyph_cost(glyph) for count, glyph in zip(histogram, glyphs))
+
+def digit_histogram(counts: Mapping[str, int], base: int, width: Optional[int] = None) -> List[int]:
+    """Count the digits needed to write the code points of counts in base.
+
+    Args:
+        counts: Number of occurrences of each character
+        base: Base the code points are written in
+        width: Fixed number of digits per code point, or None for unpadded
+            digits (as str() writes them)
+
+    Returns:
+        Number of occurrences of each digit value, indexed by value
+    """
+    histogram = [0] * base
+    for char, count in counts.items():
+        n = ord(char)
+        for _ in range(width or 1):
+            n, digit = divmod(n, base)
+            histogram[digit] += count
+        while n and width is None:
+            n, digit = divmod(n, base)
+            histogram[digit] += count
+    return histogram
+
+def assign_glyphs(histogram: Sequence[int], glyphs: Sequence[str]) -> List[str]:
+    """Pick a glyph for each digit value so that the payload is smallest.
+
+    The cheapest glyphs go to the most frequent digits. When writing digit
+    d with glyphs[d] is already as small, that natural assignment is kept,
+    so alphabets whose glyphs all cost the same are left untouched.
+
+    Args:
+        histogram: Number of occurrences of each digit value
+        glyphs: Candidate glyphs, at least len(histogram) of them
+
+    Returns:
+        The glyph of each digit value
+    """
+    n = len(histogram)
+    if len(glyphs) < n:
+        raise ValueError(f"Need at least {n} glyphs, got {len(glyphs)}")
+    natural = list(glyphs[:n])
+    ranked = sorted(range(n), key=lambda d: -histogram[d])
+    chosen = natural[:]
+    for digit, glyph in zip(ranked, sorted(glyphs, key=glyph_cost)):
+        chosen[digit] = glyph
+    if payload_cost(histogram, natural) <= payload_cost(histogram, chosen):
+        return natural
+    return chosen
+
+def radix_candidates(costs: Sequence[int], max_code_point: int) -> List[int]:
+    """The bases worth trying for the radix encoding, largest first.
+
+    Each base needs a histogram of the whole input, so trying all of them
+    is too slow for word lists of thousands of glyphs. Among the bases that
+    write a code point with the same number of digits, the smallest uses
+    only the cheapest glyphs and the largest spreads the digits over the
+    most values; in between, only the largest base of each glyph-cost tier
+    can do better, as the next base adds a dearer glyph.
+
+    Args:
+        costs: Glyph costs in increasing order
+        max_code_point: Largest code point to write
+    """
+    n = len(costs)
+    # Largest base of each cost tier: the next glyph costs more
+    tiers = {base for base in range(2, n + 1) if base == n or costs[base] > costs[base - 1]}
+    candidates, base = set(), 2
+    while base <= n:
+        width = digit_width(base, max_code_point)
+        # Largest base with this width (digits of width only grow with base down)
+        low, high = base, n
+        while low < high:
+            mid = (low + high + 1) // 2
+            if digit_width(mid, max_code_point) == width:
+                low = mid
+            else:
+                high = mid - 1
+        candidates.update([base, low])
+        candidates.update(t for t in tiers if base <= t <= low)
+        base = low + 1
+    return sorted(candidates, reverse=True)
+
+def choose_radix(counts: Mapping[str, int], glyphs: Sequence[str]) -> Tuple[int, List[str]]:
+    """Choose the base, width and glyphs of the radix encoding of counts.
+
+    A smaller base made of cheap glyphs can beat the whole alphabet even
+    though every character then needs more digits, so several bases are
+    tried (see radix_candidates).
+
+    Returns:
+        (width, digit glyphs), the base being the number of glyphs
+    """
+    max_code_point = max(map(ord, counts), default=0)
+    costs = sorted(map(glyph_cost, glyphs))
+    best: Optional[Tuple[int, int, List[int]]] = None
+    # Larger bases first, so that ties keep the larger (natural) alphabet
+    for base in radix_candidates(costs, max_code_point):
+        width = digit_width(base, max_code_point)
+        histogram = digit_histogram(counts, base, width)
+        frequencies = sorted(filter(None, histogram), reverse=True)
+        cost = sum(count * c for count, c in zip(frequencies, costs))
+        if best is None or cost < best[0]:
+            best = (cost, width, histogram)
+    _, width, histogram = best
+    return width, assign_glyphs(histogram, glyphs)
+
+def choose_bigint_glyphs(glyphs: Sequence[str]) -> List[str]:
+    """Choose the digit glyphs of the bigint encoding.
+
+    The digits of one huge number are about equally frequent, so only the
+    base matters: n glyphs write log2(256) / log2(n) digits per byte, each
+    costing the average size of the n cheapest glyphs.
+
+    Returns:
+        The chosen glyphs, in alphabet order
+    """
+    costs = sorted(map(glyph_cost, glyphs))
+    total, best, best_base = 0, None, len(glyphs)
+    for base, cost in enumerate(costs, 1):
+        total += cost
+        if base < 2:
+            continue
+        per_byte = total / base / math.log2(base)
+        if best is None or per_byte <= best:
+            best, best_base = per_byte, base
+    cheapest = sorted(glyphs, key=glyph_cost)[:best_base]
+    keep = set(cheapest)
+    return [glyph for glyph in glyphs if glyph in keep]
+
+def describe_assignment(assignment: Dict[int, str]) -> str:
+    """Format a digit value -> glyph assignment for display."""
+    return ", ".join(f"{digit}={glyph!r} ({glyph_cost(glyph)}B)" for digit, glyph in sorted(assignment.items()))
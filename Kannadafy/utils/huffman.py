@@ -0,0 +1,91 @@
+"""
+Huffman Coding Utilities for Kannadafy
+
+This module builds prefix-free codes over an alphabet of glyphs from the
+character frequencies of a source, so that frequent characters take a
+single glyph and rare ones several, with no separators in between.
+"""
+
+import heapq
+import itertools
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from .glyph_cost import assign_glyphs, glyph_cost
+from .validation import validate_prefix_free
+
+def huffman_code(counts: Mapping[str, int], base: int) -> Dict[str, List[int]]:
+    """Build a base-ary Huffman code for the characters of counts.
+
+    Args:
+        counts: Number of occurrences of each character
+        base: Number of digits of the code (at least 2)
+
+    Returns:
+        The digits of the codeword of each character; a lone character
+        gets a one-digit codeword
+    """
+    if base < 2:
+        raise ValueError("Base must be at least 2")
+    if len(counts) == 1:
+        return {char: [0] for char in counts}
+
+    order = itertools.count()
+    # Ties are broken by insertion order so the code is deterministic
+    heap = [(counts[char], next(order), char) for char in sorted(counts)]
+    # Empty leaves make every merge take exactly `base` nodes
+    while len(heap) > 1 and (len(heap) - 1) % (base - 1):
+        heap.append((0, next(order), None))
+    heapq.heapify(heap)
+    while len(heap) > 1:
+        children = [heapq.heappop(heap) for _ in range(min(base, len(heap)))]
+        # The heaviest child gets digit 0
+        heapq.heappush(heap, (sum(c[0] for c in children), next(order), [c[2] for c in reversed(children)]))
+
+    code: Dict[str, List[int]] = {}
+    stack = [(heap[0][2], [])] if heap else []
+    while stack:
+        node, digits = stack.pop()
+        if isinstance(node, list):
+            stack.extend((child, digits + [d]) for d, child in enumerate(node))
+        elif node is not None:
+            code[node] = digits
+    return code
+
+def choose_huffman(counts: Mapping[str, int], glyphs: Sequence[str]) -> Tuple[Dict[str, str], Dict[int, str]]:
+    """Choose a Huffman code over glyphs with the smallest UTF-8 payload.
+
+    Every number of glyphs from 2 to len(glyphs) is tried (a few cheap
+    glyphs can beat many expensive ones) and the digits of the best code
+    are written with glyphs picked by assign_glyphs.
+
+    Args:
+        counts: Number of occurrences of each character
+        glyphs: Prefix-free candidate glyphs
+
+    Returns:
+        (codeword of each character as a string of glyphs, glyph of each
+        digit value the codewords use)
+    """
+    validate_prefix_free(glyphs)
+    costs = sorted(map(glyph_cost, glyphs))
+    best = None
+    # More digits than characters cannot make codewords any shorter
+    for base in range(min(len(glyphs), max(2, len(counts))), 1, -1):
+        code = huffman_code(counts, base)
+        histogram = [0] * base
+        for char, digits in code.items():
+            for digit in digits:
+                histogram[digit] += counts[char]
+        frequencies = sorted(filter(None, histogram), reverse=True)
+        cost = sum(count * c for count, c in zip(frequencies, costs))
+        if best is None or cost < best[0]:
+            best = (cost, code, histogram)
+    if best is None:
+        return {}, {}
+
+    _, code, histogram = best
+    digit_glyphs = assign_glyphs(histogram, glyphs)
+    codewords = {char: "".join(digit_glyphs[d] for d in digits) for char, digits in code.items()}
+    # Prefix-free glyphs make prefix-free codewords; check before emitting
+    validate_prefix_free(list(codewords.values()))
+    return codewords, {d: digit_glyphs[d] for d, count in enumerate(histogram) if count}
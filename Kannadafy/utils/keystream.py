@@ -0,0 +1,42 @@
+"""
+Keystream Utilities for Kannadafy
+
+This module XORs a payload with a keystream derived from a key with
+shake_256, as the last stage before glyph encoding. Both directions make
+the keystream with one bulk digest call and XOR it with the payload as
+two big integers, so the cost stays a few milliseconds per megabyte
+instead of a Python loop over every byte.
+"""
+
+import hashlib
+import os
+from typing import Tuple, Union
+
+# Bytes of a key made up when none is given
+KEY_SIZE = 16
+
+def new_key() -> bytes:
+    """Return a random key."""
+    return os.urandom(KEY_SIZE)
+
+def as_key(key: Union[str, bytes]) -> bytes:
+    """Return key as bytes (UTF-8 for a str)."""
+    return key.encode("utf-8") if isinstance(key, str) else bytes(key)
+
+def xor_keystream(data: bytes, key: bytes) -> bytes:
+    """XOR data with the shake_256 keystream of key; applying it twice gives data back."""
+    stream = hashlib.shake_256(key).digest(len(data))
+    return (int.from_bytes(data, "big") ^ int.from_bytes(stream, "big")).to_bytes(len(data), "big")
+
+def unxor_expr(key: bytes, codec: str) -> Tuple[str, str]:
+    """Return the code to put around a latin-1 string expression to undo xor_keystream.
+
+    Returns:
+        (text before, text after) the expression; together they evaluate
+        to the original data decoded with codec
+    """
+    return (
+        '(lambda b:(int.from_bytes(b,"big")^int.from_bytes(__import__("hashlib").shake_256({!r}).digest(len(b)),'
+        '"big")).to_bytes(len(b),"big").decode("{}"))('.format(key, codec),
+        '.encode("latin-1"))'
+    )
@@ -0,0 +1,152 @@
+"""
+Source Minification Utilities for Kannadafy
+
+This module strips the parts of a Python source that are thrown away when
+it runs (comments, docstrings, trailing whitespace and blank lines) before
+it is glyph-encoded, and can shrink indentation to one space per level.
+Docstrings are found with ast and everything else with tokenize, so string
+literals are never touched, and the result is checked to parse to the same
+tree as the source.
+"""
+
+import ast
+import io
+import tokenize
+from typing import List, Tuple
+
+# Tokens that carry no text of their own
+_LAYOUT_TOKENS = (tokenize.NEWLINE, tokenize.NL, tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER)
+
+def _docstrings(tree: ast.AST) -> List[Tuple[ast.AST, ast.Expr]]:
+    """Return the (node, docstring statement) pairs of tree.
+
+    Docstrings followed by another statement on the same line are left
+    out: removing them would leave a stray semicolon.
+    """
+    found = []
+    for node in ast.walk(tree):
+        if not isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        body = node.body
+        if (body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant)
+                and isinstance(body[0].value.value, str)
+                and (len(body) == 1 or body[1].lineno > body[0].end_lineno)):
+            found.append((node, body[0]))
+    return found
+
+def _strip_docstrings(tree: ast.AST) -> ast.AST:
+    """Remove the docstrings of tree in place, as minify_source does."""
+    for node, docstring in _docstrings(tree):
+        node.body[0:1] = [] if len(node.body) > 1 or isinstance(node, ast.Module) else [ast.Pass()]
+    return tree
+
+def _remove_docstrings(source: str) -> str:
+    """Cut the docstrings out of source, leaving pass where a body would be empty."""
+    tree = ast.parse(source)
+    lines = io.StringIO(source, newline="").readlines()
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+
+    def offset(lineno, col):
+        # ast columns count UTF-8 bytes
+        return starts[lineno - 1] + len(lines[lineno - 1].encode("utf-8")[:col].decode("utf-8"))
+
+    edits = []
+    for node, docstring in _docstrings(tree):
+        keep_pass = len(node.body) == 1 and not isinstance(node, ast.Module)
+        edits.append((offset(docstring.lineno, docstring.col_offset),
+                      offset(docstring.end_lineno, docstring.end_col_offset), "pass" if keep_pass else ""))
+    for start, end, text in sorted(edits, reverse=True):
+        source = source[:start] + text + source[end:]
+    return source
+
+def _string_rows(tokens) -> Tuple[set, set]:
+    """Rows whose start, and rows whose end, lie inside a string literal."""
+    starts_inside, ends_inside = set(), set()
+    fstring_start = getattr(tokenize, "FSTRING_START", None)
+    fstring_end = getattr(tokenize, "FSTRING_END", None)
+    depth, opened = 0, None
+    for token in tokens:
+        # Python 3.12+ splits f-strings into several tokens
+        if token.type == fstring_start:
+            depth += 1
+            opened = opened or token.start
+            continue
+        if token.type == fstring_end:
+            depth -= 1
+            if depth:
+                continue
+            first, last = opened[0], token.end[0]
+            opened = None
+        elif depth or token.type in _LAYOUT_TOKENS or token.start[0] == token.end[0]:
+            continue
+        else:
+            first, last = token.start[0], token.end[0]
+        starts_inside.update(range(first + 1, last + 1))
+        ends_inside.update(range(first, last))
+    return starts_inside, ends_inside
+
+def minify_source(source: str, keep_docstrings: bool = False, indent: bool = False) -> str:
+    """Strip what a Python source does not need to run.
+
+    Comments, trailing whitespace and blank lines are removed, and so are
+    docstrings unless keep_docstrings is set (a body left empty gets
+    pass). With indent, every indentation level becomes one space and
+    continuation lines lose their leading whitespace. Lines inside string
+    literals are kept as they are.
+
+    Args:
+        source: Python source to minify
+        keep_docstrings: Keep docstrings, so __doc__ still works
+        indent: Indent with one space per level
+
+    Returns:
+        The minified source
+
+    Raises:
+        ValueError: If source is not valid Python
+    """
+    try:
+        expected = ast.parse(source)
+        if not keep_docstrings:
+            source = _remove_docstrings(source)
+            _strip_docstrings(expected)
+        tokens = list(tokenize.generate_tokens(io.StringIO(source, newline="").readline))
+    except (SyntaxError, tokenize.TokenError) as e:
+        raise ValueError(f"Cannot minify a source that is not valid Python: {e}")
+
+    lines = io.StringIO(source, newline="").readlines()
+    starts_inside, ends_inside = _string_rows(tokens)
+    comments, levels = {}, {}
+    level, logical = 0, True
+    for token in tokens:
+        if token.type == tokenize.INDENT:
+            level += 1
+        elif token.type == tokenize.DEDENT:
+            level -= 1
+        elif token.type == tokenize.NEWLINE:
+            logical = True
+        elif token.type == tokenize.COMMENT:
+            comments[token.start[0]] = token.start[1]
+        elif token.type not in _LAYOUT_TOKENS:
+            if logical:
+                levels[token.start[0]] = level
+            logical = False
+
+    out = []
+    for row, line in enumerate(lines, 1):
+        if row in ends_inside:
+            text, end = line, ""
+        else:
+            text, end = line[:comments.get(row, len(line))].rstrip(), "\n"
+        if indent and row not in starts_inside:
+            stripped = text.lstrip(" \t\f")
+            text = " " * levels[row] + stripped if row in levels else stripped
+        if text or row in starts_inside or row in ends_inside:
+            out.append(text + end)
+    result = "".join(out)
+
+    if ast.dump(ast.parse(result)) != ast.dump(expected):
+        raise ValueError("Minification changed the meaning of the source")
+    return result
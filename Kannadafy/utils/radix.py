@@ -0,0 +1,118 @@
+"""
+Radix Conversion Utilities for Kannadafy
+
+This module converts very large numbers to and from lists of digits in an
+arbitrary base. Both directions split the number in halves recursively, so
+the cost follows the cost of multiplication instead of growing
+quadratically with the number of digits. Encoding does its arithmetic with
+the decimal module, whose multiplication and division of huge numbers are
+much faster than those of int.
+"""
+
+import decimal
+from typing import List
+
+# Below this many digits (or bytes) the plain int conversions are used
+_SMALL_DIGITS = 64
+_SMALL_BYTES = 256
+
+# Exact integer arithmetic on numbers of any size
+_CONTEXT = decimal.Context(
+    prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN,
+    traps=[decimal.Inexact, decimal.Rounded]
+)
+
+def _decimal_from_bytes(data: bytes) -> decimal.Decimal:
+    """Return the big-endian unsigned value of data as a Decimal."""
+    # powers[k] = 256 ** (_SMALL_BYTES * 2 ** k)
+    powers = [decimal.Decimal(256) ** _SMALL_BYTES]
+
+    def convert(start: int, end: int, level: int) -> decimal.Decimal:
+        # Converts data[start:end], which is at most _SMALL_BYTES * 2 ** level long
+        if level == 0:
+            return decimal.Decimal(int.from_bytes(data[start:end], "big"))
+        split = max(start, end - _SMALL_BYTES * 2 ** (level - 1))
+        low = convert(split, end, level - 1)
+        if split == start:
+            return low
+        return convert(start, split, level - 1) * powers[level - 1] + low
+
+    level = 0
+    while _SMALL_BYTES * 2 ** level < len(data):
+        if level >= len(powers):
+            powers.append(powers[-1] * powers[-1])
+        level += 1
+    return convert(0, len(data), level)
+
+def bytes_to_base(data: bytes, base: int) -> List[int]:
+    """Return the digits of the big-endian number `data` in `base`.
+
+    Args:
+        data: Bytes read as one big-endian unsigned integer
+        base: Base of the digits (at least 2)
+
+    Returns:
+        List of digits, most significant first, without leading zeros
+        ([0] for zero)
+    """
+    if base < 2:
+        raise ValueError("Base must be at least 2")
+
+    with decimal.localcontext(_CONTEXT):
+        value = _decimal_from_bytes(data)
+
+        # powers[k] = base ** (_SMALL_DIGITS * 2 ** k); the last one is
+        # only used to know where to start
+        powers = [decimal.Decimal(base) ** _SMALL_DIGITS]
+        while powers[-1] <= value:
+            powers.append(powers[-1] * powers[-1])
+
+        digits: List[int] = []
+
+        def emit(number: decimal.Decimal, level: int, pad: bool) -> None:
+            # number < base ** (_SMALL_DIGITS * 2 ** level); with pad,
+            # write exactly that many digits
+            if level == 0:
+                small, number = [], int(number)
+                while number:
+                    number, digit = divmod(number, base)
+                    small.append(digit)
+                if pad:
+                    small.extend([0] * (_SMALL_DIGITS - len(small)))
+                digits.extend(reversed(small))
+                return
+            high, low = divmod(number, powers[level - 1])
+            if high or pad:
+                emit(high, level - 1, pad)
+                emit(low, level - 1, True)
+            else:
+                emit(low, level - 1, False)
+
+        emit(value, len(powers) - 1, False)
+    return digits or [0]
+
+def digit_width(base: int, max_value: int) -> int:
+    """Number of base-`base` digits needed to write every value up to max_value."""
+    width = 1
+    while base ** width <= max_value:
+        width += 1
+    return width
+
+def to_base(n: int, base: int) -> List[int]:
+    """Return the digits of the non-negative integer n in `base`."""
+    if n < 0:
+        raise ValueError("Only non-negative integers can be converted")
+    return bytes_to_base(n.to_bytes((n.bit_length() + 7) // 8, "big"), base)
+
+def from_base(digits: List[int], base: int) -> int:
+    """Return the integer written by `digits` in `base`, most significant first.
+
+    This is the same pairwise combination the bigint decoder stub performs.
+    """
+    values, power = list(digits) or [0], base
+    while len(values) > 1:
+        if len(values) % 2:
+            values.insert(0, 0)
+        values = [a * power + b for a, b in zip(values[::2], values[1::2])]
+        power *= power
+    return values[0]
@@ -45,10 +45,7 @@ def get_text_file_words(text_files: List[str]) -> Optional[List[str]]:
             print(f"Error reading {file_path}: {e}")
 
     # Remove duplicates while preserving order
-    unique_words = []
-    for word in words:
-        if word not in unique_words:
-            unique_words.append(word)
+    unique_words = list(dict.fromkeys(words))
 
     # Filter out any empty strings
     unique_words = [w for w in unique_words if w]
@@ -0,0 +1,85 @@
+"""
+Token Dictionary Utilities for Kannadafy
+
+This module replaces the most frequent names of a source (keywords,
+builtins and identifiers such as def, return, self or print) with single
+escape characters before it is glyph-encoded. The names are found with
+tokenize, so text inside strings and comments is left as is, and the
+dictionary is written in the stub, which expands the escapes with one
+str.translate.
+"""
+
+import collections
+import io
+import re
+import tokenize
+from typing import Dict, List, Tuple
+
+from .whitespace import free_code_points
+
+# Most names one source gets an escape for
+TOKEN_MAX_ESCAPES = 128
+
+# Characters an entry of the stub's table costs besides the name itself
+# (the code point, quotes, colon and comma)
+_ENTRY_COST = 6
+
+# Names, for sources that tokenize rejects
+_WORD = re.compile(r"[^\W\d]\w*")
+
+def _name_spans(text: str) -> List[Tuple[int, int]]:
+    """Return the (start, end) offsets of the NAME tokens of text.
+
+    Sources that tokenize rejects are scanned for identifier-like words
+    instead; either way, replacing the spans is reversible.
+    """
+    lines = io.StringIO(text, newline="").readlines()
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+    try:
+        return [
+            (starts[token.start[0] - 1] + token.start[1], starts[token.end[0] - 1] + token.end[1])
+            for token in tokenize.generate_tokens(io.StringIO(text, newline="").readline)
+            if token.type == tokenize.NAME
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return [match.span() for match in _WORD.finditer(text)]
+
+def encode_tokens(text: str, max_escapes: int = TOKEN_MAX_ESCAPES) -> Tuple[str, Dict[int, str]]:
+    """Replace the most frequent names of text with escapes.
+
+    A name gets an escape when the characters it saves, (occurrences - 1)
+    per extra character, outweigh its entry in the stub's table; the
+    names that save the most are kept.
+
+    Args:
+        text: Source to encode
+        max_escapes: Most escapes to use
+
+    Returns:
+        (encoded text, escape code point -> name it stands for); the table
+        is empty, and the text unchanged, when nothing is worth escaping
+    """
+    spans = _name_spans(text)
+    names = collections.Counter(text[start:end] for start, end in spans)
+
+    def saved(name):
+        return names[name] * (len(name) - 1) - len(name) - _ENTRY_COST
+
+    chosen = sorted((name for name in names if saved(name) > 0), key=lambda name: (saved(name), name),
+                    reverse=True)[:max_escapes]
+    if not chosen:
+        return text, {}
+    table = dict(zip(free_code_points(text, len(chosen)), chosen))
+    escapes = {name: chr(cp) for cp, name in table.items()}
+
+    parts, pos = [], 0
+    for start, end in spans:
+        escape = escapes.get(text[start:end])
+        if escape is not None:
+            parts.append(text[pos:start])
+            parts.append(escape)
+            pos = end
+    parts.append(text[pos:])
+    return "".join(parts), table
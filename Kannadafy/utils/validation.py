@@ -17,6 +17,25 @@ def validate_mapping(characters: List[str]) -> bool:
         raise ValueError("Mapping contains duplicate characters")
     return True
 
+def validate_prefix_free(glyphs: List[str]) -> bool:
+    """Validate that no glyph is a prefix of another one.
+
+    Only then can glyphs written one after the other, without separators,
+    be split back unambiguously.
+
+    Args:
+        glyphs: The glyphs to validate
+
+    Returns:
+        True if valid, raises ValueError otherwise
+    """
+    ordered = sorted(glyphs)
+    # In sorted order a prefix comes right before the strings it starts
+    for shorter, longer in zip(ordered, ordered[1:]):
+        if longer.startswith(shorter):
+            raise ValueError(f"Glyph {shorter!r} is a prefix of {longer!r}")
+    return True
+
 def validate_input_file(file_path: str, file_type: str = "input") -> bool:
     """Validate that an input file exists and is readable.
 
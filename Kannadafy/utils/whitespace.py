@@ -0,0 +1,83 @@
+"""
+Whitespace Run-Length Utilities for Kannadafy
+
+This module replaces the indentation at the start of lines and the runs of
+spaces inside them with single escape characters before a source is
+glyph-encoded, and builds the expression the decoder stub uses to expand
+them again. Escapes are code points the source does not contain, lowest
+first, so they stay cheap in every encoding and a single str.translate
+restores the source.
+"""
+
+import collections
+import re
+from typing import Dict, List, Tuple
+
+# Most escapes one source gets; each costs an entry in the stub's table
+WHITESPACE_MAX_ESCAPES = 32
+
+# A newline with the indentation of the next line, or a run of spaces
+_RUN = re.compile(r"\n +| {2,}")
+
+def free_code_points(text: str, n: int) -> List[int]:
+    """Return the n lowest code points that do not occur in text."""
+    used = set(map(ord, text))
+    free, cp = [], 0
+    while len(free) < n:
+        if cp not in used and not 0xD800 <= cp < 0xE000:
+            free.append(cp)
+        cp += 1
+    return free
+
+def encode_whitespace(text: str, max_escapes: int = WHITESPACE_MAX_ESCAPES) -> Tuple[str, Dict[int, str]]:
+    """Replace indentation and runs of spaces in text with escapes.
+
+    Every line start ("\\n" and the indentation of the next line) and run
+    of spaces is counted, and the ones that save the most characters get
+    an escape. Other runs are written with the longest escapes that fit
+    and plain spaces for the rest.
+
+    Args:
+        text: Source to encode
+        max_escapes: Most escapes to use
+
+    Returns:
+        (encoded text, escape code point -> text it stands for); the table
+        is empty, and the text unchanged, when nothing is worth escaping
+    """
+    runs = collections.Counter(match.group() for match in _RUN.finditer(text))
+    chosen = sorted(runs, key=lambda run: ((len(run) - 1) * runs[run], run), reverse=True)[:max_escapes]
+    if not chosen:
+        return text, {}
+    table = dict(zip(free_code_points(text, len(chosen)), chosen))
+    escapes = {run: chr(cp) for cp, run in table.items()}
+    line_starts = sorted((len(run) - 1 for run in chosen if run[0] == "\n"), reverse=True)
+    spaces = sorted((len(run) for run in chosen if run[0] == " "), reverse=True)
+
+    def fill(n):
+        # Runs of n spaces with the longest escapes that fit
+        parts = []
+        for length in spaces:
+            count, n = divmod(n, length)
+            parts.append(escapes[" " * length] * count)
+        return "".join(parts) + " " * n
+
+    def replace(run):
+        if run in escapes:
+            return escapes[run]
+        if run[0] == " ":
+            return fill(len(run))
+        indent = len(run) - 1
+        start = next((n for n in line_starts if n <= indent), 0)
+        return (escapes["\n" + " " * start] if start else "\n") + fill(indent - start)
+
+    cache = {run: replace(run) for run in runs}
+    return _RUN.sub(lambda match: cache[match.group()], text), table
+
+def expand_expr(table: Dict[int, str]) -> Tuple[str, str]:
+    """Return the code to put around a string expression to expand its escapes.
+
+    Returns:
+        (text before, text after) the expression
+    """
+    return "(", ").translate({" + ",".join("{}:{!r}".format(cp, run) for cp, run in table.items()) + "})"
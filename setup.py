@@ -24,6 +24,9 @@ setup(
     install_requires=[
         'pyyaml>=5.1',  # For YAML configuration files
     ],
+    extras_require={
+        'numpy': ['numpy'],  # Vectorised encoding of large inputs
+    },
     classifiers=[
         'Programming Language :: Python :: 3',
         'Programming Language :: Python :: 3.6',
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Encoding benchmark for Kannadafy.
+Compares the per-character digits encoder with the translate-table kernel
+(and the NumPy kernel when NumPy is installed) on the sources in tests/
+and on a large synthetic module, for the digits and radix encodings.
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Kannadafy.core import CHARACTER_SETS, _char_counts, _get_encoder, _numpy
+
+def legacy_encode(in_s, alphabet):
+    """The original per-character digits payload, kept for comparison."""
+    d1 = dict(enumerate(alphabet))
+    return "  ".join(" ".join(d1[int(i)] for i in str(ord(c))) for c in in_s)
+
+def synthetic_source(size_mb):
+    """Build a synthetic Python module of roughly size_mb megabytes."""
+    block = (
+        "def handler_{0}(request, context=None):\n"
+        "    \"\"\"Handle request number {0}.\"\"\"\n"
+        "    value = request.get('field_{0}', 0) * {0}\n"
+        "    return {{'status': 'ok', 'value': value, 'name': 'ಕನ್ನಡ'}}\n\n"
+    )
+    parts, size, i = [], 0, 0
+    while size < size_mb * 1024 * 1024:
+        part = block.format(i)
+        parts.append(part)
+        size += len(part)
+        i += 1
+    return "".join(parts)
+
+def best_of(func, repeat):
+    """Return the best wall-clock time of `repeat` runs of func."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run_case(name, source, alphabet, repeat, encoding="digits"):
+    """Time the encoders on one source and check they agree.
+
+    The digits encoding is compared with legacy_encode, the radix one with
+    its Python kernel.
+    """
+    backends = ["python", "numpy"] if _numpy() is not None else ["python"]
+    counts = None if encoding == "digits" else _char_counts([source])
+    if encoding == "digits":
+        expected = legacy_encode(source, alphabet)
+        timings = [("legacy", best_of(lambda: legacy_encode(source, alphabet), repeat))]
+    else:
+        expected, timings = None, []
+
+    for backend in backends:
+        encode_piece = _get_encoder(alphabet, encoding, counts, backend=backend).encode_piece
+        output = encode_piece(source)
+        if expected is None:
+            expected = output
+        elif output != expected:
+            print(f"{name}: {encoding} {backend} output differs!")
+            return False
+        timings.append((backend, best_of(lambda: encode_piece(source), repeat)))
+
+    mb = len(source.encode("utf-8")) / (1024 * 1024)
+    print(f"{name + ' ' + encoding:<40} {mb:8.2f} MB  " + "  ".join(
+        f"{label} {seconds:7.3f}s ({timings[0][1] / seconds if seconds else float('inf'):5.1f}x)"
+        for label, seconds in timings
+    ))
+    return True
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the Kannadafy encoders")
+    parser.add_argument("--size-mb", type=float, default=50, help="Size of the synthetic module (default: 50)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (default: 3)")
+    args = parser.parse_args()
+
+    alphabet = CHARACTER_SETS["kannada"]
+    tests_dir = os.path.dirname(os.path.abspath(__file__))
+    ok = True
+
+    sources = sorted(glob.glob(os.path.join(tests_dir, "*.py")))
+    combined = []
+    for path in sources:
+        with open(path, "r", encoding="utf-8") as f:
+            combined.append(f.read())
+    synthetic = synthetic_source(args.size_mb)
+    for encoding in ["digits", "radix"]:
+        ok &= run_case(f"tests/*.py ({len(sources)} files)", "".join(combined), alphabet, args.repeat, encoding)
+        ok &= run_case(f"synthetic ({args.size_mb:g} MB)", synthetic, alphabet, 1, encoding)
+
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
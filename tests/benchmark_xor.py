@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Keystream XOR benchmark for Kannadafy.
+Compares the time a stub takes to decode a synthetic module with and
+without the keystream XOR stage, and times the XOR stage on its own.
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# benchmark_encode sits next to this file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from Kannadafy.core import CHARACTER_SETS, COMPRESSIONS, ENCODINGS, encode_string
+from Kannadafy.utils.keystream import new_key, unxor_expr, xor_keystream
+from benchmark_encode import synthetic_source
+
+def decode_stub(stub):
+    """Run stub with exec intercepted; return (seconds, decoded source)."""
+    code = compile(stub.replace("exec(", "_decoded(", 1), "<stub>", "exec")
+    decoded = []
+    start = time.perf_counter()
+    exec(code, {"_decoded": decoded.append, "__file__": "<stub>"})
+    return time.perf_counter() - start, decoded[0]
+
+def time_unxor(source):
+    """Time the stub's XOR expression alone on source."""
+    key = new_key()
+    payload = xor_keystream(source.encode("utf-8"), key).decode("latin-1")
+    before, after = unxor_expr(key, "utf-8")
+    code = compile(f"{before}_payload{after}", "<unxor>", "eval")
+    start = time.perf_counter()
+    result = eval(code, {"_payload": payload})
+    elapsed = time.perf_counter() - start
+    return elapsed, result == source
+
+def run_case(size_mb, alphabet, encoding, compress):
+    """Decode one synthetic module with the plain and the XOR stub."""
+    source = synthetic_source(size_mb)
+    timings = []
+    for key in (None, True):
+        stub = encode_string(source, alphabet, encoding, compress=compress, xor_key=key)
+        seconds, decoded = decode_stub(stub)
+        if decoded != source:
+            print(f"{size_mb:g} MB: {'xor' if key else 'plain'} stub decodes to a different source!")
+            return False
+        timings.append(seconds)
+    unxor_seconds, ok = time_unxor(source)
+    if not ok:
+        print(f"{size_mb:g} MB: XOR expression does not restore the source!")
+        return False
+
+    plain, xored = timings
+    print(f"{size_mb:6g} MB  plain {plain:7.3f}s  xor {xored:7.3f}s  "
+          f"overhead {xored - plain:+7.3f}s  XOR stage alone {unxor_seconds:6.3f}s")
+    return True
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the keystream XOR stage of Kannadafy stubs")
+    parser.add_argument("--sizes", type=float, nargs="+", default=[1, 50],
+                        help="Sizes of the synthetic modules in MB (default: 1 50)")
+    parser.add_argument("--encoding", choices=ENCODINGS, default="radix",
+                        help="Payload encoding (default: radix)")
+    parser.add_argument("-c", "--compress", choices=COMPRESSIONS, default=None,
+                        help="Compress the source before the XOR stage")
+    args = parser.parse_args()
+
+    alphabet = CHARACTER_SETS["kannada"]
+    ok = True
+    for size_mb in args.sizes:
+        ok &= run_case(size_mb, alphabet, args.encoding, args.compress)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -87,6 +87,43 @@ def verify_file_executable(file_path):
         print_error(f"File is not executable")
         return False
 
+def decoded(stub):
+    """Return the source an obfuscated stub would run, without running it."""
+    found = []
+    exec(compile(stub.replace("exec(", "_decoded(", 1), "<stub>", "exec"), {"_decoded": found.append})
+    return found[0]
+
+def verify_round_trip(file_path, source_path="tests/test_script.py"):
+    """Verify that an obfuscated file decodes to the source it was made from."""
+    with open(source_path, "r", encoding="utf-8") as f:
+        source = f.read()
+    with open(file_path, "r", encoding="utf-8") as f:
+        if decoded(f.read()) == source:
+            print_success(f"{file_path} decodes to {source_path}")
+            return True
+    print_error(f"{file_path} does not decode to {source_path}")
+    return False
+
+def verify_syntax_tree(file_path, keep_docstrings=False, source_path="tests/test_script.py"):
+    """Verify that a minified output decodes to the syntax tree of its source.
+
+    Minifying changes the text of the source but must keep its syntax tree,
+    less the docstrings unless keep_docstrings.
+    """
+    import ast
+    from Kannadafy.utils.minify import _strip_docstrings
+
+    with open(source_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    if not keep_docstrings:
+        _strip_docstrings(tree)
+    with open(file_path, "r", encoding="utf-8") as f:
+        if ast.dump(ast.parse(decoded(f.read()))) == ast.dump(tree):
+            print_success(f"{file_path} decodes to the syntax tree of {source_path}")
+            return True
+    print_error(f"{file_path} does not decode to the syntax tree of {source_path}")
+    return False
+
 def setup_test_environment():
     """Set up the test environment."""
     print_header("Setting up test environment")
@@ -284,6 +321,433 @@ def run_multi_themed_test():
 
     return False
 
+def write_large_source(path, text="ನಮಸ್ಕಾರ", tail=""):
+    """Write a source longer than STREAM_CHUNK_SIZE bytes and return it.
+
+    text, when given, starts one byte before the end of the first chunk,
+    so its first character is cut in two by the chunk boundary; tail ends
+    the source, past the first chunk.
+    """
+    from Kannadafy.core import STREAM_CHUNK_SIZE
+
+    line = "total = total + 1  # padding\n"
+    head = "total = 0\n" + line * ((STREAM_CHUNK_SIZE - 32) // len(line))
+    source = head
+    if text:
+        source += "#" * (STREAM_CHUNK_SIZE - 1 - len(head)) + text + "\n"
+    source += line * (STREAM_CHUNK_SIZE // len(line)) + "print(total)\n" + tail
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(source)
+    return source
+
+def run_stream_test():
+    """Test that the streaming and parallel paths write exactly what encode_string() does."""
+    print_header("Testing Streaming Output")
+
+    from Kannadafy.core import CHARACTER_SETS, encode_string
+
+    kannadafy_cmd = get_kannadafy_command()
+    # Plain ASCII goes through the memory-mapped path, which has to fall
+    # back when a non-ASCII byte only shows up after the first chunk
+    inputs = {
+        "tests/output/stream_unicode.py": write_large_source("tests/output/stream_unicode.py"),
+        "tests/output/stream_ascii.py": write_large_source("tests/output/stream_ascii.py", ""),
+        "tests/output/stream_ascii_tail.py": write_large_source("tests/output/stream_ascii_tail.py", "",
+                                                                "# ಕನ್ನಡ\n"),
+    }
+    # The input is longer than PARALLEL_MIN_CHUNK too, so -j 2 splits it
+    modes = {"plain": "", "stream": "--stream", "jobs": "-j 2"}
+    all_successful = True
+
+    for input_file, source in inputs.items():
+        for encoding in ["digits", "radix"]:
+            expected = encode_string(source, CHARACTER_SETS["kannada"], encoding)
+            for mode, flags in modes.items():
+                output_file = input_file.replace(".py", f"_{encoding}_{mode}.py")
+                command = f"{kannadafy_cmd} obfuscate -i {input_file} -o {output_file} -e {encoding} {flags}"
+                success, _ = run_command(command)
+                if not (success and verify_file_exists(output_file)):
+                    all_successful = False
+                    continue
+                with open(output_file, "r", encoding="utf-8") as f:
+                    if f.read() == expected:
+                        print_success(f"{output_file} matches encode_string()")
+                    else:
+                        print_error(f"{output_file} differs from encode_string()")
+                        all_successful = False
+
+    return all_successful
+
+def run_radix_encoding_test():
+    """Test the radix and huffman payload encodings with a script and a wordlist."""
+    print_header("Testing Radix and Huffman Encodings")
+
+    kannadafy_cmd = get_kannadafy_command()
+    commands = {
+        "tests/output/radix_obfuscated.py":
+            f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o tests/output/radix_obfuscated.py -e radix",
+        "tests/output/radix_emoji_obfuscated.py":
+            f"{kannadafy_cmd} text-obfuscate -i tests/test_script.py -o tests/output/radix_emoji_obfuscated.py "
+            f"-t patterns/emoji_pattern.txt -e radix",
+        "tests/output/huffman_obfuscated.py":
+            f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o tests/output/huffman_obfuscated.py -e huffman",
+        "tests/output/huffman_emoji_obfuscated.py":
+            f"{kannadafy_cmd} text-obfuscate -i tests/test_script.py -o tests/output/huffman_emoji_obfuscated.py "
+            f"-t patterns/emoji_pattern.txt -e huffman",
+    }
+    all_successful = True
+
+    for output_file, command in commands.items():
+        success, _ = run_command(command)
+        if not (success and verify_file_exists(output_file) and verify_file_executable(output_file)):
+            all_successful = False
+
+    return all_successful
+
+def run_fanout_test():
+    """Test obfuscating one script with several alphabets at once."""
+    print_header("Testing Multi-Alphabet Fan-Out")
+
+    kannadafy_cmd = get_kannadafy_command()
+    command = f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o tests/output/fanout.py -s kannada,telugu,greek"
+    success, _ = run_command(command)
+    if not success:
+        return False
+
+    all_successful = True
+    for script in ["kannada", "telugu", "greek"]:
+        output_file = f"tests/output/fanout_{script}.py"
+        if not (verify_file_exists(output_file) and verify_file_executable(output_file)):
+            all_successful = False
+
+    return all_successful
+
+def run_auto_script_test():
+    """Test automatic alphabet selection."""
+    print_header("Testing Automatic Alphabet Selection")
+
+    kannadafy_cmd = get_kannadafy_command()
+    output_file = "tests/output/auto_obfuscated.py"
+    command = (f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o {output_file} -s auto "
+               f"--candidates patterns/emoji_pattern.txt")
+    success, output = run_command(command)
+    if not (success and "Chosen script:" in output):
+        return False
+    if not (verify_file_exists(output_file) and verify_file_executable(output_file)):
+        return False
+
+    # Batch runs return the alphabet chosen for each file
+    from Kannadafy import CHARACTER_SETS, obfuscate_multiple
+
+    print_step("Returning the choice of each file from obfuscate_multiple")
+    results = obfuscate_multiple(["tests/test_script.py"], "tests/output/auto_multi", "auto")
+    fixed = obfuscate_multiple(["tests/test_script.py"], "tests/output/auto_multi_fixed", "telugu")
+    if not (all(result.script_type in CHARACTER_SETS for result in results.values())
+            and [result.script_type for result in fixed.values()] == ["telugu"]):
+        print_error(f"Chosen scripts not returned: {results}, {fixed}")
+        return False
+    return all(verify_file_executable(result.output) for result in results.values())
+
+def run_compression_test():
+    """Test every compression stage."""
+    print_header("Testing Compression")
+
+    kannadafy_cmd = get_kannadafy_command()
+    all_successful = True
+
+    for method in ["zlib", "bz2", "lzma", "auto"]:
+        output_file = f"tests/output/compress_{method}_obfuscated.py"
+        command = f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o {output_file} -c {method}"
+        success, _ = run_command(command)
+        if not (success and verify_file_exists(output_file) and verify_file_executable(output_file)
+                and verify_round_trip(output_file)):
+            all_successful = False
+
+    return all_successful
+
+def run_whitespace_test():
+    """Test the whitespace run-length stage with every encoding."""
+    print_header("Testing Whitespace Stage")
+
+    kannadafy_cmd = get_kannadafy_command()
+    all_successful = True
+
+    for encoding in ["digits", "radix", "bigint", "huffman"]:
+        output_file = f"tests/output/whitespace_{encoding}_obfuscated.py"
+        command = f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o {output_file} -e {encoding} --whitespace"
+        success, _ = run_command(command)
+        if not (success and verify_file_exists(output_file) and verify_file_executable(output_file)
+                and verify_round_trip(output_file)):
+            all_successful = False
+
+    return all_successful
+
+def run_token_dictionary_test():
+    """Test the token dictionary stage, alone and with the other stages."""
+    print_header("Testing Token Dictionary Stage")
+
+    kannadafy_cmd = get_kannadafy_command()
+    all_successful = True
+
+    for name, options in [("tokens", "--tokens"), ("tokens_all", "--tokens --whitespace -c auto")]:
+        output_file = f"tests/output/{name}_obfuscated.py"
+        command = f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o {output_file} {options}"
+        success, _ = run_command(command)
+        if not (success and verify_file_exists(output_file) and verify_file_executable(output_file)
+                and verify_round_trip(output_file)):
+            all_successful = False
+
+    return all_successful
+
+def run_minify_test():
+    """Test the minify stage and its options."""
+    print_header("Testing Minify Stage")
+
+    kannadafy_cmd = get_kannadafy_command()
+    all_successful = True
+
+    for name, options in [("minify", "--minify"), ("minify_docs", "--minify --keep-docstrings"),
+                          ("minify_indent", "--minify --minify-indent --tokens --whitespace -c auto")]:
+        output_file = f"tests/output/{name}_obfuscated.py"
+        command = f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o {output_file} {options}"
+        success, _ = run_command(command)
+        if not (success and verify_file_exists(output_file) and verify_file_executable(output_file)
+                and verify_syntax_tree(output_file, "--keep-docstrings" in options)):
+            all_successful = False
+
+    # The minify options are rejected without --minify
+    for options in ["--keep-docstrings", "--minify-indent"]:
+        command = f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o tests/output/minify_rejected.py {options}"
+        success, _ = run_command(command, expected_return_code=2)
+        if not (success and not os.path.exists("tests/output/minify_rejected.py")):
+            all_successful = False
+
+    return all_successful
+
+def run_xor_test():
+    """Test the keystream XOR stage with and without a key and compression."""
+    print_header("Testing Keystream XOR Stage")
+
+    kannadafy_cmd = get_kannadafy_command()
+    all_successful = True
+
+    for name, options in [("xor", "--xor"), ("xor_key", "--xor secret -e bigint"),
+                          ("xor_compress", "--xor -c auto --tokens")]:
+        output_file = f"tests/output/{name}_obfuscated.py"
+        command = f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o {output_file} {options}"
+        success, _ = run_command(command)
+        if not (success and verify_file_exists(output_file) and verify_file_executable(output_file)
+                and verify_round_trip(output_file)):
+            all_successful = False
+
+    return all_successful
+
+def run_chunked_layout_test():
+    """Test the chunked layout and the diff report."""
+    print_header("Testing Chunked Layout")
+
+    kannadafy_cmd = get_kannadafy_command()
+    all_successful = True
+
+    for encoding in ["digits", "radix"]:
+        output_file = f"tests/output/chunked_{encoding}_obfuscated.py"
+        command = f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o {output_file} --layout chunked -e {encoding}"
+        success, _ = run_command(command)
+        if not (success and verify_file_exists(output_file) and verify_file_executable(output_file)):
+            all_successful = False
+
+    # Compare the test script with a copy that has one more line
+    edited_file = "tests/output/test_script_edited.py"
+    with open("tests/test_script.py", "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    lines.insert(len(lines) // 2, "# An edit in the middle of the script\n")
+    with open(edited_file, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    success, output = run_command(f"{kannadafy_cmd} diff-report tests/test_script.py {edited_file}")
+    if not (success and "chunked" in output):
+        all_successful = False
+
+    return all_successful
+
+def run_pipeline_test():
+    """Test pipelines given as a spec and as a file."""
+    print_header("Testing Pipelines")
+
+    kannadafy_cmd = get_kannadafy_command()
+    all_successful = True
+
+    pipeline_file = "tests/output/pipeline.yaml"
+    with open(pipeline_file, "w", encoding="utf-8") as f:
+        f.write("stages:\n  - minify: {keep_docstrings: true}\n  - whitespace\n  - compress: lzma\n")
+
+    # Pipelines that minify are checked against the syntax tree of the
+    # script (keep_docstrings set), the others against its text
+    for name, pipeline, keep_docstrings in [("pipeline_spec", "minify=indent,tokens,compress=auto,xor", False),
+                                            ("pipeline_order", "compress=zlib,xor=secret,whitespace", None),
+                                            ("pipeline_file", pipeline_file, True)]:
+        output_file = f"tests/output/{name}_obfuscated.py"
+        command = (f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o {output_file} "
+                   f"--pipeline \"{pipeline}\" --report")
+        success, _ = run_command(command)
+        if not (success and verify_file_exists(output_file) and verify_file_executable(output_file)):
+            all_successful = False
+        elif not (verify_round_trip(output_file) if keep_docstrings is None
+                  else verify_syntax_tree(output_file, keep_docstrings)):
+            all_successful = False
+
+    return all_successful
+
+def run_in_memory_test():
+    """Test obfuscating sources in memory."""
+    print_header("Testing In-Memory API")
+
+    from Kannadafy import obfuscate_source, obfuscate_sources
+
+    with open("tests/test_script.py", "r", encoding="utf-8") as f:
+        source = f.read()
+    sources = {"script": source, "variant": source.replace("Hello", "Namaskara")}
+
+    all_successful = True
+    for encoding in ["digits", "radix", "huffman"]:
+        print_step(f"Obfuscating in memory with the {encoding} encoding")
+        outputs = obfuscate_sources(sources, alphabet="kannada", encoding=encoding)
+        outputs["single"] = obfuscate_source(source, alphabet="auto", encoding=encoding, compress="zlib")
+        expected = dict(sources, single=source)
+        if all(decoded(outputs[name]) == expected[name] for name in expected):
+            print_success(f"{encoding} outputs decode to their sources")
+        else:
+            print_error(f"{encoding} outputs do not decode to their sources")
+            all_successful = False
+
+    return all_successful
+
+def run_obfuscator_test():
+    """Test a reusable Obfuscator shared by several threads."""
+    print_header("Testing Reusable Obfuscator")
+
+    import threading
+    from Kannadafy import Obfuscator
+
+    with open("tests/test_script.py", "r", encoding="utf-8") as f:
+        source = f.read()
+    # The last sources hold characters the shared encoder was not built for
+    sources = [source.replace("Hello", f"Hello {i}") for i in range(40)] + [source.replace("Hello", "ನಮಸ್ಕಾರ")]
+
+    all_successful = True
+    for encoding in ["digits", "radix", "huffman"]:
+        print_step(f"Obfuscating from 4 threads with the {encoding} encoding")
+        obfuscator = Obfuscator("kannada", encoding=encoding)
+        outputs = [None] * len(sources)
+
+        def work(start):
+            for i in range(start, len(sources), 4):
+                outputs[i] = obfuscator.obfuscate_source(sources[i])
+
+        threads = [threading.Thread(target=work, args=(start,)) for start in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if all(output is not None and decoded(output) == expected for output, expected in zip(outputs, sources)):
+            print_success(f"{encoding} outputs decode to their sources")
+        else:
+            print_error(f"{encoding} outputs do not decode to their sources")
+            all_successful = False
+
+    return all_successful
+
+def run_alphabet_test():
+    """Test compiled alphabets."""
+    print_header("Testing Compiled Alphabets")
+
+    from Kannadafy import Alphabet, CHARACTER_SETS, get_alphabet, obfuscate_source
+
+    with open("tests/test_script.py", "r", encoding="utf-8") as f:
+        source = f.read()
+
+    all_successful = True
+    for script in CHARACTER_SETS:
+        print_step(f"Compiling the {script} alphabet")
+        alphabet = get_alphabet(script)
+        if alphabet != Alphabet(CHARACTER_SETS[script]) or alphabet.digest != Alphabet(list(alphabet)).digest:
+            print_error(f"{script} alphabet does not compare equal to its glyphs")
+            all_successful = False
+        for encoding in ["digits", "radix"]:
+            if obfuscate_source(source, alphabet, encoding) != obfuscate_source(source, CHARACTER_SETS[script], encoding):
+                print_error(f"{script} alphabet gives a different {encoding} output than its glyphs")
+                all_successful = False
+
+    print_step("Rejecting invalid alphabets")
+    for glyphs in [["a"] * 10, ["a", "b"]]:
+        try:
+            Alphabet(glyphs)
+            print_error(f"Invalid alphabet accepted: {glyphs}")
+            all_successful = False
+        except ValueError:
+            pass
+
+    return all_successful
+
+def run_encoders_test():
+    """Test listing the available encodings."""
+    print_header("Testing Encoder Registry")
+
+    kannadafy_cmd = get_kannadafy_command()
+    success, output = run_command(f"{kannadafy_cmd} encoders")
+    return success and all(name in output for name in ["digits", "radix", "bigint", "huffman"])
+
+def run_shared_dictionary_test():
+    """Test batch compression against a shared dictionary."""
+    print_header("Testing Shared Compression Dictionary")
+
+    # Create test scripts
+    create_additional_test_scripts()
+
+    kannadafy_cmd = get_kannadafy_command()
+    output_dir = "tests/output/shared_dict"
+    command = (f"{kannadafy_cmd} multi-obfuscate -i tests/script1.py tests/script2.py tests/script3.py "
+               f"-o {output_dir} -c zlib --shared-dict")
+    success, _ = run_command(command)
+    if not (success and verify_file_exists(f"{output_dir}/kannadafy.zdict")):
+        return False
+
+    all_successful = True
+    for i in range(1, 4):
+        file_path = f"{output_dir}/script{i}_obfuscated.py"
+        if not (verify_file_exists(file_path) and verify_file_executable(file_path)):
+            all_successful = False
+    return all_successful
+
+def run_layout_test():
+    """Test every payload layout."""
+    print_header("Testing Payload Layouts")
+
+    kannadafy_cmd = get_kannadafy_command()
+    all_successful = True
+
+    for layout in ["concat", "continuation", "single", "bytes"]:
+        output_file = f"tests/output/layout_{layout}_obfuscated.py"
+        command = f"{kannadafy_cmd} obfuscate -i tests/test_script.py -o {output_file} --layout {layout}"
+        success, _ = run_command(command)
+        if not (success and verify_file_exists(output_file) and verify_file_executable(output_file)
+                and verify_round_trip(output_file)):
+            all_successful = False
+
+    return all_successful
+
+def run_glyph_report_test():
+    """Test the glyph assignment report with a mixed-size emoji wordlist."""
+    print_header("Testing Glyph Assignment Report")
+
+    kannadafy_cmd = get_kannadafy_command()
+    output_file = "tests/output/report_emoji_obfuscated.py"
+    command = (f"{kannadafy_cmd} text-obfuscate -i tests/test_script.py -o {output_file} "
+               f"-t patterns/emoji_pattern.txt --report")
+    success, output = run_command(command)
+    if not (success and "glyphs:" in output):
+        return False
+    return verify_file_exists(output_file) and verify_file_executable(output_file)
+
 def main():
     """Main function to run all tests."""
     print_header("Kannadafy Comprehensive Test Suite")
@@ -298,7 +762,25 @@ def main():
         {"name": "Themed Obfuscation Tests", "function": run_themed_obfuscation_tests},
         {"name": "Multi-Pattern Test", "function": run_multi_pattern_test},
         {"name": "Multi-File Test", "function": run_multi_file_test},
-        {"name": "Multi-File Themed Test", "function": run_multi_themed_test}
+        {"name": "Multi-File Themed Test", "function": run_multi_themed_test},
+        {"name": "Stream Test", "function": run_stream_test},
+        {"name": "Radix Encoding Test", "function": run_radix_encoding_test},
+        {"name": "Glyph Report Test", "function": run_glyph_report_test},
+        {"name": "Layout Test", "function": run_layout_test},
+        {"name": "Fan-Out Test", "function": run_fanout_test},
+        {"name": "Auto Script Test", "function": run_auto_script_test},
+        {"name": "Compression Test", "function": run_compression_test},
+        {"name": "Shared Dictionary Test", "function": run_shared_dictionary_test},
+        {"name": "Whitespace Test", "function": run_whitespace_test},
+        {"name": "Token Dictionary Test", "function": run_token_dictionary_test},
+        {"name": "Minify Test", "function": run_minify_test},
+        {"name": "Keystream XOR Test", "function": run_xor_test},
+        {"name": "Chunked Layout Test", "function": run_chunked_layout_test},
+        {"name": "Pipeline Test", "function": run_pipeline_test},
+        {"name": "In-Memory API Test", "function": run_in_memory_test},
+        {"name": "Reusable Obfuscator Test", "function": run_obfuscator_test},
+        {"name": "Compiled Alphabet Test", "function": run_alphabet_test},
+        {"name": "Encoder Registry Test", "function": run_encoders_test}
     ]
 
     results = []